@@ -0,0 +1,534 @@
+"""Offline benchmark for the playlist pipeline.
+
+Runs the real playlist_maker code paths (safe_search, search_and_add_songs and
+the batch adders, through a real spotipy client) against a local stand-in for
+the Spotify Web API, so throughput and retry behaviour can be measured without
+touching the real service. --startup instead times cold starts of the CLI,
+and --parse the song file parser on its own. --processes runs several
+copies at once against one fake API that enforces --server-rps, to see how
+the shared rate budget (--rate-budget) keeps them under it.
+
+Usage:
+    python benchmark.py --sizes 100 1000 10000 --latency-ms 20 --rate-limit-rate 0.01
+    python benchmark.py --startup
+    python benchmark.py --parse 5000000
+    python benchmark.py --sizes 2000 --processes 3 --server-rps 100 --rate-budget 90
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+import spotipy
+
+from playlist_maker.config import RATE_LIMIT_PER_SEC, SEARCH_CONCURRENCY
+from playlist_maker.governor import RateGovernor, RateLimitGate, set_rate_gate
+from playlist_maker.parser import canonical_key, iter_songs_from_file, read_songs_from_file
+from playlist_maker.playlist import open_playlist_job, search_and_add_songs
+from playlist_maker.session import build_http_session
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakeSpotifyAPI(ThreadingHTTPServer):
+    """Minimal local Spotify Web API: /me, /search, playlist create and playlist items.
+
+    Every request waits latency +/- jitter seconds; a fraction of requests can
+    be answered with 429 + Retry-After or with a 500 instead. With max_rps,
+    requests beyond that many in the last second also get a 429, like the
+    real API's rolling window. Call counts are read and reset through
+    /_bench/stats and /_bench/reset.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.02, jitter=0.01, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1, miss_rate=0.05, seed=0, max_rps=0):
+        super().__init__(('127.0.0.1', 0), FakeSpotifyHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.miss_rate = miss_rate
+        self.max_rps = max_rps
+        self.recent = deque()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.playlists = {}
+
+    @property
+    def prefix(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/"
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def over_limit(self):
+        """Count a request against max_rps; True if it goes over the last second's limit."""
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            while self.recent and now - self.recent[0] >= 1.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.max_rps:
+                return True
+            self.recent.append(now)
+            return False
+
+    def roll(self):
+        with self.lock:
+            return self.random.random()
+
+
+
+def _serve_fake_api(config, conn):
+    api = FakeSpotifyAPI(**config)
+    conn.send(api.prefix)
+    api.serve_forever()
+
+
+def start_fake_api(**config):
+    """Start FakeSpotifyAPI in its own process (so it does not compete for the GIL).
+
+    Returns (process, api prefix URL).
+    """
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=_serve_fake_api, args=(config, child), daemon=True)
+    proc.start()
+    return proc, parent.recv()
+
+
+def _bench_call(prefix, action, method='GET'):
+    with urlopen(Request(f"{prefix}_bench/{action}", method=method, data=b'' if method == 'POST' else None)) as resp:
+        return json.loads(resp.read() or b'null')
+
+
+def _fake_track(name, artist):
+    track_id = format(abs(hash((name.casefold(), artist.casefold()))) % 62 ** 10, '022d')[-22:]
+    return {
+        'name': name,
+        'uri': f"spotify:track:{track_id}",
+        'artists': [{'name': artist}],
+        'album': {'name': f"{artist} Album"},
+        'external_ids': {'isrc': None},
+    }
+
+
+class FakeSpotifyHandler(BaseHTTPRequestHandler):
+    # keep-alive, like the real API, so connection setup is not what gets measured
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _handle(self, method):
+        api = self.server
+        url = urlparse(self.path)
+        path = url.path[len('/v1'):] if url.path.startswith('/v1') else url.path
+        path = path.rstrip('/') or '/'
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if path == '/_bench/stats':
+            with api.lock:
+                return self._send(200, dict(api.calls))
+        if path == '/_bench/reset':
+            with api.lock:
+                api.calls.clear()
+            return self._send(200, {})
+
+        delay = api.latency + (api.roll() * 2 - 1) * api.jitter
+        if delay > 0:
+            time.sleep(delay)
+        roll = api.roll()
+        limited = roll < api.rate_limit_rate or api.over_limit()
+        if limited or roll < api.rate_limit_rate + api.error_rate:
+            # drain an unread request body, or it would be parsed as the next request on this connection
+            self._body()
+        if limited:
+            api.count('429')
+            return self._send(429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                              {'Retry-After': str(api.retry_after)})
+        if roll < api.rate_limit_rate + api.error_rate:
+            api.count('500')
+            return self._send(500, {'error': {'status': 500, 'message': 'Server error'}})
+
+        parts = path.strip('/').split('/')
+        if method == 'GET' and path == '/me':
+            api.count('me')
+            return self._send(200, {'id': 'bench-user', 'display_name': 'Benchmark'})
+        if method == 'GET' and path == '/search':
+            api.count('search')
+            return self._send(200, self._search(params.get('q', ''), int(params.get('limit', 5))))
+        if method == 'POST' and len(parts) == 3 and parts[0] == 'users' and parts[2] == 'playlists':
+            api.count('playlist_create')
+            with api.lock:
+                playlist_id = format(len(api.playlists) + 1, '022d')
+                api.playlists[playlist_id] = []
+            return self._send(201, {'id': playlist_id, 'name': (self._body() or {}).get('name'),
+                                    'external_urls': {'spotify': f"https://open.spotify.com/playlist/{playlist_id}"}})
+        if len(parts) == 3 and parts[0] == 'playlists' and parts[2] in ('items', 'tracks'):
+            return self._playlist_items(method, parts[1], params)
+        return self._send(404, {'error': {'status': 404, 'message': f"No route for {method} {path}"}})
+
+    def _search(self, query, limit):
+        api = self.server
+        if query.startswith('track:"') and '"' in query[7:]:
+            name, rest = query[7:].split('"', 1)
+            artist = rest.replace('artist:', '').strip().strip('"')
+        else:
+            name, _, artist = query.partition(' ')
+        if random.Random(query).random() < api.miss_rate:
+            return {'tracks': {'items': [], 'total': 0}}
+        items = [_fake_track(name, artist or 'Unknown')]
+        items += [_fake_track(f"{name} (Live {i})", artist or 'Unknown') for i in range(1, limit)]
+        return {'tracks': {'items': items[:limit], 'total': len(items)}}
+
+    def _playlist_items(self, method, playlist_id, params):
+        api = self.server
+        with api.lock:
+            items = api.playlists.setdefault(playlist_id, [])
+            if method == 'POST':
+                body = self._body()
+                uris = body.get('uris', []) if isinstance(body, dict) else body or []
+                items.extend(uris)
+                name, status, result = 'playlist_add', 201, {'snapshot_id': str(len(items))}
+            elif method == 'DELETE':
+                gone = {t['uri'] for t in (self._body() or {}).get('tracks', [])}
+                items[:] = [u for u in items if u not in gone]
+                name, status, result = 'playlist_remove', 200, {'snapshot_id': str(len(items))}
+            else:
+                offset, limit = int(params.get('offset', 0)), int(params.get('limit', 100))
+                page = [{'track': {'uri': u}} for u in items[offset:offset + limit]]
+                more = offset + limit < len(items)
+                next_url = f"{api.prefix}playlists/{playlist_id}/items?offset={offset + limit}&limit={limit}" if more else None
+                name, status, result = 'playlist_read', 200, {'items': page, 'next': next_url, 'total': len(items)}
+        api.count(name)
+        return self._send(status, result)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+
+def generate_song_file(path, lines, dup_rate=0.1, seed=0):
+    """Write a synthetic song file; dup_rate of the lines repeat an earlier song."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(lines):
+            song = rng.randrange(n) if n and rng.random() < dup_rate else n
+            f.write(f"Song {song} – Artist {song % 997}\n")
+    return path
+
+
+# Line shapes seen in real song lists: spaced hyphen/en/em dashes, hyphenated
+# titles, quotes, NBSP and double spaces, full-width text, links and ISRCs
+PARSE_SHAPES = (
+    'Song {n} - Artist {a}',
+    'Song {n} \u2013 Artist {a}',
+    'Spider-Man {n} \u2014 Artist {a}',
+    '"Song {n}"\u00a0-\u00a0Artist  {a}',
+    '\uff33\uff4f\uff4e\uff47 {n} - Artist {a}',
+    'Song {n}-Artist {a}',
+    'https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC?si={n}',
+    'USUM7{n:07d}',
+    '',
+)
+
+
+def generate_parse_file(path, lines, seed=0):
+    """Write a song file cycling through PARSE_SHAPES in random order."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(lines):
+            f.write(rng.choice(PARSE_SHAPES).format(n=n % 10000000, a=n % 997) + '\n')
+    return path
+
+
+def measure_parse(lines):
+    """Parse a synthetic file of `lines` lines, with and without building canonical keys."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generate_parse_file(os.path.join(tmp, 'parse.txt'), lines)
+        size_mb = os.path.getsize(path) / 1e6
+        start = time.perf_counter()
+        songs = sum(1 for _ in iter_songs_from_file(path))
+        parse_secs = time.perf_counter() - start
+        start = time.perf_counter()
+        keys = len({canonical_key(song, ctx) for song, ctx in iter_songs_from_file(path)})
+        keyed_secs = time.perf_counter() - start
+    return {
+        'lines': lines,
+        'songs': songs,
+        'unique_keys': keys,
+        'file_mb': round(size_mb, 1),
+        'parse_seconds': round(parse_secs, 3),
+        'parse_lines_per_sec': round(lines / parse_secs),
+        'parse_mb_per_sec': round(size_mb / parse_secs, 1),
+        'parse_and_key_seconds': round(keyed_secs, 3),
+        'parse_and_key_lines_per_sec': round(lines / keyed_secs),
+    }
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_scenario(prefix, song_file, concurrency, stream=False, measure_memory=True, reset=True):
+    """Run search_and_add_songs for one song file against the fake API and return its numbers."""
+    # same HTTP setup as SpotifySession, with a static token instead of OAuth
+    sp = spotipy.Spotify(auth='benchmark-token', requests_session=build_http_session(concurrency))
+    sp.prefix = prefix
+
+    latencies = []
+    real_search = sp.search
+
+    def timed_search(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return real_search(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    sp.search = timed_search
+
+    if reset:
+        _bench_call(prefix, 'reset', method='POST')
+    if measure_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        playlist_id, _ = open_playlist_job(sp, 'benchmark', False, '')
+        songs = iter_songs_from_file(song_file) if stream else read_songs_from_file(song_file)
+        added, not_found = search_and_add_songs(sp, playlist_id, songs, concurrency=concurrency,
+                                                cache=None, stream=stream)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if measure_memory else 0
+    if measure_memory:
+        tracemalloc.stop()
+
+    with open(song_file, encoding='utf-8') as f:
+        lines = sum(1 for _ in f)
+    calls = _bench_call(prefix, 'stats')
+    return {
+        'lines': lines,
+        'concurrency': concurrency,
+        'stream': stream,
+        'seconds': round(elapsed, 3),
+        'lines_per_sec': round(lines / elapsed, 1) if elapsed else 0.0,
+        'added': added,
+        'not_found': not_found,
+        'api_calls': sum(v for k, v in calls.items()),
+        'calls': calls,
+        'search_p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'search_p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'peak_mem_mb': round(peak / 1e6, 2),
+    }
+
+
+def _process_scenario(prefix, song_file, concurrency, rate_budget, governor_path):
+    # each process opens the shared budget itself, like separate CLI runs would;
+    # without a path every process only pauses its own workers
+    set_rate_gate(RateGovernor(path=governor_path, rate=rate_budget) if governor_path else RateLimitGate())
+    return run_scenario(prefix, song_file, concurrency, measure_memory=False, reset=False)
+
+
+def run_processes(prefix, song_files, concurrency, rate_budget, governor_path):
+    """Run one scenario per song file, each in its own process, all at once against one fake API."""
+    _bench_call(prefix, 'reset', method='POST')
+    start = time.perf_counter()
+    with multiprocessing.Pool(len(song_files)) as pool:
+        runs = pool.starmap(_process_scenario, [(prefix, f, concurrency, rate_budget, governor_path)
+                                                for f in song_files])
+    elapsed = time.perf_counter() - start
+    calls = _bench_call(prefix, 'stats')
+    lines = sum(r['lines'] for r in runs)
+    return {
+        'processes': len(song_files),
+        'rate_budget': rate_budget,
+        'lines': lines,
+        'seconds': round(elapsed, 3),
+        'lines_per_sec': round(lines / elapsed, 1) if elapsed else 0.0,
+        'process_seconds': [r['seconds'] for r in runs],
+        'api_calls': sum(calls.values()),
+        'calls': calls,
+    }
+
+
+STARTUP_COMMANDS = {
+    'import core': ['-c', 'import playlist_maker.playlist, playlist_maker.parser'],
+    'auto.py --help': [os.path.join(HERE, 'auto.py'), '--help'],
+    'import gui': ['-c', 'import playlist_maker.gui'],
+}
+
+
+def measure_startup(runs=10):
+    """Median wall time of fresh interpreter runs for each STARTUP_COMMANDS entry, plus what the CLI loads."""
+    results = {}
+    for name, args in STARTUP_COMMANDS.items():
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + args, cwd=HERE, stdout=subprocess.DEVNULL, check=True)
+            times.append(time.perf_counter() - start)
+        results[name] = round(statistics.median(times) * 1000, 1)
+    probe = ('import sys, playlist_maker.cli; '
+             'print(",".join(m for m in ("tkinter", "spotipy", "requests") if m in sys.modules))')
+    loaded = subprocess.run([sys.executable, '-c', probe], cwd=HERE, capture_output=True, text=True, check=True)
+    results['cli_loads'] = loaded.stdout.strip().split(',') if loaded.stdout.strip() else []
+    return results
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Benchmark the playlist pipeline against a local fake Spotify API.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='number of lines in each synthetic song file (default: 100 1000 10000)')
+    parser.add_argument('--concurrency', type=int, default=SEARCH_CONCURRENCY)
+    parser.add_argument('--stream', action='store_true', help='use the streaming reader')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='base latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=10.0, help='+/- random latency per request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with each 429')
+    parser.add_argument('--miss-rate', type=float, default=0.05, help='fraction of searches that find nothing')
+    parser.add_argument('--dup-rate', type=float, default=0.1, help='fraction of input lines that repeat a song')
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc (it slows the run down)')
+    parser.add_argument('--json', metavar='PATH', help='also write the results to a JSON file')
+    parser.add_argument('--startup', action='store_true', help='time CLI cold starts instead of the pipeline')
+    parser.add_argument('--runs', type=int, default=10, help='with --startup, runs per command (default: 10)')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='run this many copies of each size at once, as separate processes')
+    parser.add_argument('--server-rps', type=int, default=0,
+                        help='fake API answers 429 above this many requests per second (default: no limit)')
+    parser.add_argument('--rate-budget', type=float, default=RATE_LIMIT_PER_SEC,
+                        help='shared client-side budget in requests per second (default: the app\'s '
+                             'PLAYLIST_RATE_LIMIT setting, %(default)g; 0 is unlimited)')
+    parser.add_argument('--no-shared-budget', action='store_true',
+                        help='with --processes, give each process its own rate gate (no shared budget or pauses)')
+    parser.add_argument('--parse', type=int, metavar='LINES', nargs='?', const=2000000,
+                        help='time the parser alone on a synthetic file (default: 2000000 lines)')
+    return parser
+
+
+def run_process_sizes(args, server, prefix):
+    """--processes: each size runs as that many concurrent processes sharing one rate budget file."""
+    results = []
+    print(f"{'lines':>8} {'procs':>6} {'secs':>8} {'lines/s':>9} {'calls':>7} {'429s':>6}  per-process secs")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in args.sizes:
+                song_files = [generate_song_file(os.path.join(tmp, f"songs_{size}_{i}.txt"), size,
+                                                 dup_rate=args.dup_rate, seed=i)
+                              for i in range(args.processes)]
+                governor_path = None if args.no_shared_budget else os.path.join(tmp, f"rate_budget_{size}.sqlite3")
+                r = run_processes(prefix, song_files, args.concurrency, args.rate_budget, governor_path)
+                results.append(r)
+                print(f"{r['lines']:>8} {r['processes']:>6} {r['seconds']:>8.2f} {r['lines_per_sec']:>9.1f} "
+                      f"{r['api_calls']:>7} {r['calls'].get('429', 0):>6}  "
+                      f"{' '.join(f'{s:.1f}' for s in r['process_seconds'])}")
+    finally:
+        server.terminate()
+        server.join()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return results
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.parse:
+        r = measure_parse(args.parse)
+        print(f"{r['lines']} lines ({r['file_mb']} MB), {r['songs']} songs, {r['unique_keys']} unique keys")
+        print(f"parse:          {r['parse_seconds']:>8.2f} s  {r['parse_lines_per_sec']:>10} lines/s  "
+              f"{r['parse_mb_per_sec']:>6.1f} MB/s")
+        print(f"parse + key:    {r['parse_and_key_seconds']:>8.2f} s  {r['parse_and_key_lines_per_sec']:>10} lines/s")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(r, f, indent=2)
+        return r
+
+    if args.startup:
+        results = measure_startup(args.runs)
+        for name in STARTUP_COMMANDS:
+            print(f"{name:<16} {results[name]:>8.1f} ms (median of {args.runs})")
+        print(f"heavy modules loaded by the CLI module: {', '.join(results['cli_loads']) or 'none'}")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+        return results
+
+    server, prefix = start_fake_api(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                                    error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                    retry_after=args.retry_after, miss_rate=args.miss_rate,
+                                    max_rps=args.server_rps)
+    if args.processes > 1:
+        return run_process_sizes(args, server, prefix)
+    results = []
+    print(f"{'lines':>8} {'secs':>8} {'lines/s':>9} {'calls':>7} {'429s':>5} {'p50 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            set_rate_gate(RateGovernor(path=os.path.join(tmp, 'rate_budget.sqlite3'), rate=args.rate_budget))
+            for size in args.sizes:
+                song_file = generate_song_file(os.path.join(tmp, f"songs_{size}.txt"), size, dup_rate=args.dup_rate)
+                r = run_scenario(prefix, song_file, args.concurrency, stream=args.stream,
+                                 measure_memory=not args.no_memory)
+                results.append(r)
+                print(f"{r['lines']:>8} {r['seconds']:>8.2f} {r['lines_per_sec']:>9.1f} {r['api_calls']:>7} "
+                      f"{r['calls'].get('429', 0):>5} {r['search_p50_ms']:>8.2f} {r['search_p99_ms']:>8.2f} "
+                      f"{r['peak_mem_mb']:>8.2f}")
+    finally:
+        server.terminate()
+        server.join()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return results
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
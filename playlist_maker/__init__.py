@@ -0,0 +1,50 @@
+"""Build Spotify playlists from song lists.
+
+Modules, importable on their own:
+
+- parser: song file and manual-entry parsing
+- search: rate-limited search, query planner and match scoring
+- playlist: creating, filling and syncing playlists
+- session: the shared authenticated Spotify client
+- catalog: local track index searched before the API
+- preview: saved preview results reused by Create
+- governor: the request budget shared across processes
+- watch: watch-folder mode, adding lines appended to song files
+- events: typed progress events and the bus the front ends subscribe to
+- profiling: sampled stacks and per-phase time and allocation reports
+- cache, journal, jobs, batch, metrics, config: supporting pieces
+- cli / gui: the two front ends
+
+Nothing heavy is imported here. The names below are loaded on first access,
+so "from playlist_maker import search_songs" never pulls in Tk, and spotipy
+is only imported once a client is created.
+"""
+import importlib
+
+_EXPORTS = {
+    'parse_line': 'parser', 'parse_text': 'parser', 'iter_songs_from_file': 'parser',
+    'read_songs_from_file': 'parser', 'SongList': 'parser',
+    'search_songs': 'search', 'resolve_line': 'search', 'safe_search': 'search',
+    'RateGovernor': 'governor', 'get_rate_gate': 'governor',
+    'EventBus': 'events', 'EventBuffer': 'events',
+    'SearchStats': 'search', 'TrackMatch': 'search', 'ResultStore': 'search',
+    'SearchCache': 'cache', 'open_search_cache': 'cache',
+    'TrackCatalog': 'catalog', 'open_catalog': 'catalog',
+    'create_spotify_client': 'session', 'get_session': 'session',
+    'search_and_add_songs': 'playlist', 'resolve_uris': 'playlist', 'sync_playlist': 'playlist',
+    'add_tracks_in_batches': 'playlist', 'open_playlist_job': 'playlist',
+    'PreviewArtifact': 'preview', 'find_fresh_preview': 'preview',
+    'JobJournal': 'journal', 'Job': 'jobs', 'JobScheduler': 'jobs', 'JobCancelled': 'jobs',
+    'run_batch': 'batch', 'FolderWatcher': 'watch', 'Profiler': 'profiling',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'playlist_maker' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,4 @@
+"""python -m playlist_maker: same as python auto.py."""
+from .cli import run
+
+run()
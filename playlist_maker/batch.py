@@ -0,0 +1,96 @@
+"""Batch mode: one playlist per song file, sharing one client and cache."""
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import SEARCH_CONCURRENCY
+from .events import events
+from .journal import JobJournal, journal_path_for
+from .metrics import metrics
+from .parser import read_songs_from_file
+from .playlist import open_playlist_job, search_and_add_songs
+from .session import current_user
+from .shard import create_sharded, plan_from_search
+
+
+def playlist_name_for(path):
+    """Default playlist name for a song file: its base name without extension, underscores as spaces."""
+    return os.path.splitext(os.path.basename(path))[0].replace('_', ' ')
+
+
+def find_song_files(target):
+    """Song files for batch mode: every .txt file in a directory, or the matches of a glob."""
+    if os.path.isdir(target):
+        return sorted(glob.glob(os.path.join(target, '*.txt')))
+    return sorted(p for p in glob.glob(target) if os.path.isfile(p))
+
+
+def run_batch(sp, files, jobs=4, concurrency=SEARCH_CONCURRENCY, cache=None, resume=False, public=True, catalog=None,
+              shard_size=None):
+    """Create one playlist per song file, running up to `jobs` files at once.
+
+    All files share the client, the logged-in user, the search cache, the
+    track catalog and the rate-limit gate; search concurrency is split between
+    the running files so the total number of requests in flight stays at
+    `concurrency`. With shard_size, each file is split over numbered playlists
+    of at most that many tracks, each with its own line-to-playlist report.
+    Returns a list of per-file result dicts.
+    """
+    user = current_user(sp)
+    events.log(f"Logged in as: {user.get('display_name')}")
+    jobs = max(1, min(jobs, len(files)))
+    per_file = max(1, concurrency // jobs)
+
+    def run_one(path):
+        name = playlist_name_for(path)
+        result = {'file': path, 'playlist': name, 'added': 0, 'not_found': 0, 'status': 'ok', 'url': None}
+        start = time.perf_counter()
+        journal = None
+        try:
+            songs = read_songs_from_file(path)
+            if not songs:
+                result['status'] = 'no songs'
+                return result
+            if shard_size:
+                plan = plan_from_search(sp, songs, shard_size, concurrency=per_file, cache=cache, catalog=catalog)
+                shards, _ = create_sharded(sp, plan, name, public, f'Created from {path}', user=user)
+                result['added'] = sum(s['added'] for s in shards)
+                result['not_found'] = len(plan.not_found())
+                result['url'] = shards[0]['url']
+                result['playlist'] = f"{name} ({len(shards)} parts)" if len(shards) > 1 else name
+                return result
+            journal = JobJournal(journal_path_for(path, name))
+            playlist_id, result['url'] = open_playlist_job(sp, name, public, f'Created from {path}',
+                                                           journal=journal, resume=resume, user=user, source=path)
+            result['added'], result['not_found'] = search_and_add_songs(
+                sp, playlist_id, songs, concurrency=per_file, cache=cache, journal=journal, catalog=catalog)
+        except Exception as e:
+            events.log(f"Error processing {path}: {e}")
+            result['status'] = f'error: {e}'
+        finally:
+            if journal is not None:
+                journal.close()
+            result['seconds'] = round(time.perf_counter() - start, 2)
+        return result
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(run_one, files))
+
+
+def print_batch_report(results, elapsed):
+    """Print one aggregate report for a batch run."""
+    events.log(f"\n{'='*60}")
+    events.log(f"Batch summary: {len(results)} files in {elapsed:.1f}s")
+    events.log(f"{'='*60}")
+    for r in results:
+        events.log(f"{r['playlist'][:36]:<36} {r['added']:>6} added {r['not_found']:>5} not found "
+                   f"{r.get('seconds', 0):>7.1f}s  {r['status']}")
+    total_added = sum(r['added'] for r in results)
+    total_missing = sum(r['not_found'] for r in results)
+    failed = sum(1 for r in results if r['status'] != 'ok')
+    calls = metrics.counters.get('search_attempts_total', 0)
+    hits = metrics.counters.get('search_cache_hits_total', 0)
+    events.log(f"{'-'*60}")
+    events.log(f"Total: {total_added} songs added, {total_missing} not found, {failed} files failed")
+    events.log(f"Search API calls: {calls}, cache hits: {hits}")
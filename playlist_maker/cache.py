@@ -0,0 +1,135 @@
+"""On-disk SQLite cache of search results."""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .config import CACHE_MAX_ENTRIES, CACHE_NEGATIVE_TTL, CACHE_PATH, CACHE_TTL
+from .events import events
+from .parser import normalize_text
+
+
+def normalize_query(query):
+    """Canonical form of a search query, used as the cache key."""
+    return normalize_text(query).casefold()
+
+
+def slim_results(results):
+    """Reduce a search response to the track fields the app actually reads."""
+    items = (results or {}).get('tracks', {}).get('items') or []
+    slim = []
+    for t in items:
+        if not t:
+            continue
+        slim.append({
+            'name': t.get('name'),
+            'uri': t.get('uri'),
+            'artists': [{'name': a.get('name')} for a in t.get('artists') or []],
+            'album': {'name': (t.get('album') or {}).get('name')},
+            'external_ids': {'isrc': (t.get('external_ids') or {}).get('isrc')},
+        })
+    return {'tracks': {'items': slim}}
+
+
+class SearchCache:
+    """SQLite-backed cache of slimmed search results keyed by normalized query.
+
+    Empty results are stored too (negative entries) with a shorter TTL. Entries
+    past their TTL are ignored and the table is trimmed to max_entries by last use.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, negative_ttl=CACHE_NEGATIVE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS search_cache ('
+            'query TEXT PRIMARY KEY, result TEXT NOT NULL, found INTEGER NOT NULL, '
+            'created REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS search_cache_last_used ON search_cache(last_used)')
+
+    def get(self, query):
+        """Return the cached slim result for query, or None on a miss or expired entry."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT result, found, created FROM search_cache WHERE query = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            result, found, created = row
+            if now - created > (self.ttl if found else self.negative_ttl):
+                self._conn.execute('DELETE FROM search_cache WHERE query = ?', (key,))
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE search_cache SET last_used = ? WHERE query = ?', (now, key))
+            self.hits += 1
+        return json.loads(result)
+
+    def put(self, query, results):
+        """Store a slim search result (an empty item list is a negative entry)."""
+        key = normalize_query(query)
+        found = 1 if results.get('tracks', {}).get('items') else 0
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO search_cache (query, result, found, created, last_used) VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(results, separators=(',', ':')), found, now, now)
+            )
+            self._puts += 1
+            if self._puts % 1000 == 0:
+                self._evict_locked()
+
+    def _evict_locked(self):
+        (count,) = self._conn.execute('SELECT COUNT(*) FROM search_cache').fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                'DELETE FROM search_cache WHERE query IN '
+                '(SELECT query FROM search_cache ORDER BY last_used ASC LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def evict(self):
+        """Trim the cache down to max_entries, dropping least recently used entries first."""
+        with self._lock:
+            self._evict_locked()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM search_cache')
+
+    def close(self):
+        with self._lock:
+            self._evict_locked()
+            self._conn.close()
+
+
+def open_search_cache(enabled=True, clear=False):
+    """Open the on-disk search cache, or return None if disabled or unavailable."""
+    if not enabled and not clear:
+        return None
+    try:
+        cache = SearchCache()
+    except Exception as e:
+        events.log(f"Search cache unavailable ({e}); continuing without it.")
+        return None
+    if clear:
+        cache.clear()
+        events.log("✓ Cleared search cache")
+    if not enabled:
+        cache.close()
+        return None
+    return cache
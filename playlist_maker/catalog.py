@@ -0,0 +1,257 @@
+"""Local track catalog: imported exports plus past API matches, searched before Spotify."""
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from .config import CATALOG_PATH, CATALOG_SCAN_LIMIT, MATCH_THRESHOLD
+from .events import events
+from .metrics import metrics
+from .parser import ISRC_RE, TRACK_LINK_RE
+from .search import match_text, score_candidate
+
+# Import column names, matched case-insensitively (Exportify-style headers included)
+_FIELD_ALIASES = {
+    'uri': ('uri', 'track uri', 'spotify uri', 'track_uri', 'url', 'id', 'track id'),
+    'name': ('name', 'track name', 'track_name', 'title', 'track', 'song'),
+    'artists': ('artists', 'artist', 'artist name(s)', 'artist names', 'artist_name', 'artist name'),
+    'album': ('album', 'album name', 'album_name'),
+    'isrc': ('isrc',),
+}
+_ARTIST_SEP = '\x1f'
+
+
+def _tokens(*texts):
+    """Index tokens of some titles/artists, in the same loose form score_candidate compares."""
+    tokens = set()
+    for text in texts:
+        tokens.update(match_text(text).split())
+    return tokens
+
+
+def _track_uri(value):
+    """spotify:track:<id> for a URI, open.spotify.com link or bare ID, else None."""
+    value = (value or '').strip()
+    if len(value) == 22 and value.isalnum():
+        return f'spotify:track:{value}'
+    m = TRACK_LINK_RE.match(value)
+    return f'spotify:track:{m.group(1)}' if m else None
+
+
+def _isrc(value):
+    m = ISRC_RE.match((value or '').strip())
+    return ''.join(m.groups()).upper() if m else None
+
+
+def _artist_names(value):
+    """Artist names from a list of names/artist objects or a "A, B" / "A; B" string."""
+    if isinstance(value, list):
+        return [a.get('name') if isinstance(a, dict) else a for a in value if a]
+    text = (value or '').strip()
+    sep = ';' if ';' in text else ','
+    return [a.strip() for a in text.split(sep) if a.strip()]
+
+
+def _normalize_record(record):
+    """Map one imported row/object onto (uri, name, artists, album, isrc), or None if unusable."""
+    fields = {k.strip().lower(): v for k, v in record.items() if isinstance(k, str)}
+
+    def pick(field):
+        for alias in _FIELD_ALIASES[field]:
+            if fields.get(alias) not in (None, ''):
+                return fields[alias]
+        return None
+
+    uri = _track_uri(pick('uri'))
+    name = pick('name')
+    if not uri or not isinstance(name, str) or not name.strip():
+        return None
+    album = pick('album')
+    if isinstance(album, dict):
+        album = album.get('name')
+    isrc = pick('isrc') or (fields.get('external_ids') or {}).get('isrc')
+    return uri, name.strip(), _artist_names(pick('artists')), album or '', _isrc(isrc)
+
+
+def _read_records(path):
+    """Rows of a CSV/TSV export or objects of a JSON Lines (or JSON array) file."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if ext in ('.jsonl', '.ndjson'):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        elif ext == '.json':
+            data = json.load(f)
+            yield from data if isinstance(data, list) else data.get('tracks', [])
+        else:
+            yield from csv.DictReader(f, delimiter='\t' if ext == '.tsv' else ',')
+
+
+class TrackCatalog:
+    """SQLite index of known tracks, searched locally before any API call.
+
+    Tracks come from imported library/playlist exports and from matches the
+    API returned earlier. Titles and artists are split into tokens in an
+    inverted index; a lookup gathers the tracks sharing the most tokens with
+    the line and scores them with score_candidate, so a local match is judged
+    exactly like an API result. ISRC lines resolve through their own index.
+    """
+
+    def __init__(self, path=CATALOG_PATH, scan_limit=CATALOG_SCAN_LIMIT):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.scan_limit = scan_limit
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS catalog_tracks ('
+            'id INTEGER PRIMARY KEY, uri TEXT NOT NULL UNIQUE, name TEXT NOT NULL, '
+            'artists TEXT NOT NULL, album TEXT NOT NULL, isrc TEXT, added REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS catalog_tracks_isrc ON catalog_tracks(isrc)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS catalog_tokens ('
+            'token TEXT NOT NULL, track_id INTEGER NOT NULL, PRIMARY KEY (token, track_id)) WITHOUT ROWID'
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM catalog_tracks').fetchone()[0]
+
+    def _insert_locked(self, uri, name, artists, album, isrc, now):
+        """Insert one track and its tokens; returns False if the URI is already known."""
+        cur = self._conn.execute(
+            'INSERT OR IGNORE INTO catalog_tracks (uri, name, artists, album, isrc, added) VALUES (?, ?, ?, ?, ?, ?)',
+            (uri, name, _ARTIST_SEP.join(artists), album, isrc, now)
+        )
+        if not cur.rowcount:
+            return False
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO catalog_tokens (token, track_id) VALUES (?, ?)',
+            [(tok, cur.lastrowid) for tok in _tokens(name, *artists)]
+        )
+        return True
+
+    def import_file(self, path, chunk=5000):
+        """Add every usable track in a CSV/TSV/JSONL/JSON export. Returns (added, skipped)."""
+        added = skipped = 0
+        now = time.time()
+        records = _read_records(path)
+        with metrics.time('catalog_import_seconds'):
+            while True:
+                rows = [r for _, r in zip(range(chunk), records)]
+                if not rows:
+                    break
+                with self._lock:
+                    self._conn.execute('BEGIN')
+                    try:
+                        for record in rows:
+                            track = _normalize_record(record) if isinstance(record, dict) else None
+                            if track is not None and self._insert_locked(*track, now):
+                                added += 1
+                            else:
+                                skipped += 1
+                        self._conn.execute('COMMIT')
+                    except BaseException:
+                        self._conn.execute('ROLLBACK')
+                        raise
+        metrics.inc('catalog_imported_total', added)
+        return added, skipped
+
+    def add(self, track):
+        """Learn a search result item (as returned by the API) so later runs resolve it locally."""
+        uri = track.get('uri')
+        if not uri or not uri.startswith('spotify:track:') or not track.get('name'):
+            return
+        artists = [a.get('name') for a in track.get('artists') or [] if a.get('name')]
+        album = (track.get('album') or {}).get('name') or ''
+        isrc = _isrc((track.get('external_ids') or {}).get('isrc'))
+        with self._lock:
+            if self._insert_locked(uri, track['name'], artists, album, isrc, time.time()):
+                self.learned += 1
+
+    def _item(self, row):
+        """A stored row in the shape of a slimmed search result item."""
+        uri, name, artists, album, isrc = row
+        return {
+            'name': name,
+            'uri': uri,
+            'artists': [{'name': a} for a in artists.split(_ARTIST_SEP) if a],
+            'album': {'name': album},
+            'external_ids': {'isrc': isrc},
+        }
+
+    def lookup_isrc(self, isrc):
+        """The track with this ISRC ("isrc:CODE" or bare code), or None."""
+        code = _isrc(isrc)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT uri, name, artists, album, isrc FROM catalog_tracks WHERE isrc = ? LIMIT 1', (code,)
+            ).fetchone() if code else None
+            self._count_locked(row is not None)
+        return self._item(row) if row else None
+
+    def lookup(self, song_name, context='', candidates=20):
+        """Best local match for a free-text line as (item, score), or (None, 0.0) below MATCH_THRESHOLD."""
+        name_tokens = _tokens(song_name)
+        votes = Counter()
+        with metrics.time('catalog_lookup_seconds'), self._lock:
+            for tok in name_tokens | _tokens(context):
+                # title tokens count double; common tokens only scan scan_limit rows
+                weight = 2 if tok in name_tokens else 1
+                for (track_id,) in self._conn.execute(
+                        'SELECT track_id FROM catalog_tokens WHERE token = ? LIMIT ?', (tok, self.scan_limit)):
+                    votes[track_id] += weight
+            ids = [track_id for track_id, _ in votes.most_common(candidates)]
+            rows = self._conn.execute(
+                f'SELECT uri, name, artists, album, isrc FROM catalog_tracks WHERE id IN ({",".join("?" * len(ids))})',
+                ids
+            ).fetchall() if ids else []
+        best, best_score = None, 0.0
+        for row in rows:
+            item = self._item(row)
+            score = score_candidate(song_name, context, item)
+            if score > best_score:
+                best, best_score = item, score
+        found = best is not None and best_score >= MATCH_THRESHOLD
+        with self._lock:
+            self._count_locked(found)
+        return (best, best_score) if found else (None, 0.0)
+
+    def _count_locked(self, found):
+        if found:
+            self.hits += 1
+            metrics.inc('catalog_hits_total')
+        else:
+            self.misses += 1
+            metrics.inc('catalog_misses_total')
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM catalog_tokens')
+            self._conn.execute('DELETE FROM catalog_tracks')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_catalog(enabled=True):
+    """Open the local track catalog, or return None if disabled or unavailable."""
+    if not enabled:
+        return None
+    try:
+        return TrackCatalog()
+    except Exception as e:
+        events.log(f"Track catalog unavailable ({e}); continuing without it.")
+        return None
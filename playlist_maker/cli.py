@@ -0,0 +1,308 @@
+"""Command line interface; also decides between CLI and GUI at startup."""
+import argparse
+import os
+import sys
+import time
+
+from .batch import find_song_files, playlist_name_for, print_batch_report, run_batch
+from .cache import open_search_cache
+from .catalog import open_catalog
+from .config import PLAYLIST_MAX_TRACKS, SEARCH_CONCURRENCY, WATCH_INTERVAL
+from .events import METRIC_KINDS, events, record_metrics
+from .journal import JobJournal, journal_path_for
+from .metrics import metrics
+from .parser import iter_songs_from_file, read_songs_from_file
+from .playlist import add_preview_matches, open_playlist_job, search_and_add_songs, sync_existing_playlist
+from .preview import PreviewArtifact, find_fresh_preview, is_preview_file
+from .profiling import Profiler
+from .progress import ConsolePrinter
+from .session import create_spotify_client
+from .shard import create_sharded, plan_from_preview, plan_from_search
+from .watch import FolderWatcher
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog='auto.py',
+        description='Create a Spotify playlist from a song file. Run without arguments to open the GUI.',
+        epilog='File format: each line should be "Song Name – Movie/Artist Name".',
+    )
+    parser.add_argument('song_file', nargs='?',
+                        help='UTF-8 text file with one song per line, or a saved preview (.jsonl/.csv) to create without searching')
+    parser.add_argument('playlist_name', nargs='?', help='playlist name (default: file name without extension)')
+    parser.add_argument('--concurrency', type=int, default=SEARCH_CONCURRENCY,
+                        help=f'number of searches run in parallel (default: {SEARCH_CONCURRENCY})')
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help='create one playlist per .txt file in a directory (or per glob match) with a shared client')
+    parser.add_argument('--jobs', type=int, default=4, help='with --batch, number of files processed at once (default: 4)')
+    parser.add_argument('--stream', action='store_true',
+                        help='read, search and add lazily so memory stays flat on very large files')
+    parser.add_argument('--sync', metavar='PLAYLIST',
+                        help='update an existing playlist (ID, URI, URL or name) instead of creating a new one')
+    parser.add_argument('--reorder', action='store_true',
+                        help='with --sync, also reorder the playlist to match the file')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the interrupted job for this file and playlist name instead of starting over')
+    parser.add_argument('--shard', metavar='SIZE', type=int, nargs='?', const=PLAYLIST_MAX_TRACKS,
+                        help='split the tracks over numbered playlists "Name (1/N)" of at most SIZE tracks '
+                             f'(default: {PLAYLIST_MAX_TRACKS}), created and filled in parallel')
+    parser.add_argument('--shard-report', metavar='PATH',
+                        help='with --shard, where to write the CSV mapping each input line to its playlist')
+    parser.add_argument('--watch', metavar='DIR_OR_GLOB',
+                        help='keep running and add lines appended to any .txt file in a directory (or glob match) '
+                             'to that file\'s playlist')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL,
+                        help=f'with --watch, seconds between checks (default: {WATCH_INTERVAL:g})')
+    parser.add_argument('--once', action='store_true', help='with --watch, check once and exit (e.g. from cron)')
+    parser.add_argument('--quiet', action='store_true',
+                        help="don't print every line's search result, only messages and summaries")
+    parser.add_argument('--profile', action='store_true',
+                        help='sample stacks and allocations per phase (parse, search, add) and write '
+                             'flamegraph stacks and reports to the log directory')
+    parser.add_argument('--metrics-json', metavar='PATH', help='write run metrics as JSON when done')
+    parser.add_argument('--metrics-prom', metavar='PATH', help='write run metrics in Prometheus text format when done')
+    parser.add_argument('--no-cache', action='store_true', help='bypass the on-disk search cache')
+    parser.add_argument('--clear-cache', action='store_true', help='empty the search cache before running')
+    parser.add_argument('--catalog-import', metavar='EXPORT', action='append',
+                        help='add the tracks of a CSV/TSV/JSONL export to the local catalog (repeatable)')
+    parser.add_argument('--no-catalog', action='store_true',
+                        help='skip the local track catalog and send every line to the API')
+    return parser
+
+
+def main(argv=None):
+    print("=" * 60)
+    print("Spotify Playlist Creator")
+    print("=" * 60)
+
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    # progress from the core functions arrives as events; print it, and feed metrics when they'll be exported
+    printer = ConsolePrinter(quiet=args.quiet).subscribe()
+    if args.metrics_json or args.metrics_prom:
+        events.subscribe(record_metrics, METRIC_KINDS)
+    profiler = Profiler().start() if args.profile else None
+    try:
+        run_cli(parser, args)
+    finally:
+        events.unsubscribe(printer)
+        events.unsubscribe(record_metrics)
+        if profiler is not None:
+            print(f"✓ Profile written to {profiler.stop()} (stacks.txt, phases.txt, allocations.txt)")
+
+
+def run_cli(parser, args):
+    if args.catalog_import:
+        import_catalog(args.catalog_import)
+    if args.watch:
+        if args.song_file or args.batch or args.sync or args.shard is not None or args.resume:
+            parser.error('--watch cannot be combined with a song file, --batch, --sync, --shard or --resume')
+    elif not args.song_file and not args.batch:
+        if args.clear_cache:
+            open_search_cache(enabled=False, clear=True)
+            return
+        if args.catalog_import:
+            return
+        parser.error('a song file is required')
+    if args.batch and (args.stream or args.sync):
+        parser.error('--batch cannot be combined with --stream or --sync')
+    if args.shard is not None:
+        if args.shard < 1:
+            parser.error('--shard size must be at least 1')
+        if args.sync or args.resume:
+            parser.error('--shard cannot be combined with --sync or --resume')
+
+    try:
+        with metrics.time('job_seconds'):
+            if args.watch:
+                run_cli_watch(args)
+            elif args.batch:
+                run_cli_batch(args)
+            else:
+                run_cli_job(args)
+    finally:
+        for path in (args.metrics_json, args.metrics_prom):
+            if path:
+                metrics.export(path)
+                print(f"✓ Metrics written to {path}")
+
+
+def import_catalog(paths):
+    """Import library/playlist exports into the local track catalog."""
+    catalog = open_catalog()
+    if catalog is None:
+        sys.exit(1)
+    try:
+        for path in paths:
+            try:
+                added, skipped = catalog.import_file(path)
+            except (OSError, ValueError) as e:
+                print(f"Error importing {path}: {e}")
+                continue
+            print(f"✓ Imported {added} tracks from {path} ({skipped} skipped or already known)")
+        print(f"Track catalog: {len(catalog)} tracks")
+    finally:
+        catalog.close()
+
+
+def run_cli_batch(args):
+    """Process every song file matched by --batch with one client and one aggregate report."""
+    files = find_song_files(args.batch)
+    if not files:
+        print(f"Error: no song files found for '{args.batch}'!")
+        sys.exit(1)
+    print(f"\nBatch: {len(files)} song files, up to {args.jobs} at a time\n")
+
+    start = time.perf_counter()
+    sp = create_spotify_client(pool_size=args.concurrency)
+    cache = open_search_cache(enabled=not args.no_cache, clear=args.clear_cache)
+    catalog = open_catalog(not args.no_catalog)
+    try:
+        results = run_batch(sp, files, jobs=args.jobs, concurrency=args.concurrency, cache=cache,
+                            resume=args.resume, catalog=catalog, shard_size=args.shard)
+    finally:
+        if cache is not None:
+            cache.close()
+        if catalog is not None:
+            catalog.close()
+    print_batch_report(results, time.perf_counter() - start)
+
+
+def run_cli_watch(args):
+    """Watch a folder of song files, adding appended lines until interrupted (or once with --once)."""
+    sp = create_spotify_client(pool_size=args.concurrency)
+    cache = open_search_cache(enabled=not args.no_cache, clear=args.clear_cache)
+    catalog = open_catalog(not args.no_catalog)
+    watcher = FolderWatcher(sp, args.watch, cache=cache, catalog=catalog, concurrency=args.concurrency)
+    try:
+        if args.once:
+            print(f"{watcher.poll()} new lines processed")
+        else:
+            watcher.run(args.interval)
+    finally:
+        watcher.state.close()
+        if cache is not None:
+            cache.close()
+        if catalog is not None:
+            catalog.close()
+
+
+def run_cli_job(args):
+    """Create (or sync) one playlist from the song file named in the parsed CLI args.
+
+    The file may also be a saved preview; a fresh preview of the same song
+    list is used automatically unless --no-cache is given.
+    """
+    filename = args.song_file
+    artifact = PreviewArtifact.load(filename) if is_preview_file(filename) else None
+    if artifact is not None and not artifact.complete:
+        print("Warning: this preview did not finish; only the lines it covers will be added.")
+    if artifact is not None and artifact.errors:
+        print(f"Warning: {len(artifact.errors)} lines of this preview failed to search and will not be added. "
+              f"Run the original song file to search them again.")
+
+    # Get playlist name (use filename without extension as default)
+    if args.playlist_name:
+        playlist_name = args.playlist_name
+    elif artifact is not None and artifact.playlist:
+        playlist_name = artifact.playlist
+    else:
+        playlist_name = playlist_name_for(filename)
+    
+    playlist_description = f'Created from {filename}'
+    
+    print(f"\nReading songs from: {filename}")
+    print(f"Playlist name: {playlist_name}\n")
+    
+    # Read songs from file (streaming mode parses lazily while searching)
+    if artifact is not None:
+        songs = []
+    elif args.stream:
+        if not os.path.exists(filename):
+            print(f"Error: File '{filename}' not found!")
+            sys.exit(1)
+        songs = iter_songs_from_file(filename)
+    else:
+        songs = read_songs_from_file(filename)
+        if not songs:
+            print("No songs found or error reading file!")
+            sys.exit(1)
+        if not args.no_cache:
+            artifact = find_fresh_preview(songs)
+    
+    # Set up authentication
+    sp = create_spotify_client(pool_size=args.concurrency)
+    
+    if args.sync:
+        sync_existing_playlist(sp, args.sync, songs, concurrency=args.concurrency,
+                               use_cache=not args.no_cache, clear_cache=args.clear_cache, reorder=args.reorder,
+                               use_catalog=not args.no_catalog, artifact=artifact)
+        return
+
+    if args.shard:
+        run_cli_shards(args, sp, songs, artifact, playlist_name, playlist_description)
+        return
+
+    # Create the playlist (or pick the interrupted one back up)
+    journal = JobJournal(journal_path_for(filename, playlist_name))
+    playlist_id, playlist_url = open_playlist_job(sp, playlist_name, True, playlist_description,
+                                                  journal=journal, resume=args.resume, source=filename)
+    print()
+
+    if artifact is not None:
+        try:
+            added, not_found = add_preview_matches(sp, playlist_id, artifact, journal=journal)
+        finally:
+            journal.close()
+        print_summary(added, not_found, playlist_url)
+        return
+
+    # Search and add songs
+    cache = open_search_cache(enabled=not args.no_cache, clear=args.clear_cache)
+    catalog = open_catalog(not args.no_catalog)
+    try:
+        added, not_found = search_and_add_songs(sp, playlist_id, songs, concurrency=args.concurrency,
+                                                 cache=cache, stream=args.stream, journal=journal, catalog=catalog)
+    finally:
+        journal.close()
+        if cache is not None:
+            cache.close()
+        if catalog is not None:
+            catalog.close()
+    print_summary(added, not_found, playlist_url)
+
+
+def run_cli_shards(args, sp, songs, artifact, playlist_name, description):
+    """Resolve everything first, then create and fill the numbered shard playlists."""
+    if artifact is not None:
+        print(f"Using saved preview {artifact.path}, no searches needed")
+        plan = plan_from_preview(artifact, args.shard)
+    else:
+        cache = open_search_cache(enabled=not args.no_cache, clear=args.clear_cache)
+        catalog = open_catalog(not args.no_catalog)
+        try:
+            plan = plan_from_search(sp, songs, args.shard, concurrency=args.concurrency, cache=cache, catalog=catalog)
+        finally:
+            if cache is not None:
+                cache.close()
+            if catalog is not None:
+                catalog.close()
+    create_sharded(sp, plan, playlist_name, True, description, report_path=args.shard_report)
+
+
+def print_summary(added, not_found, playlist_url):
+    print(f"\n{'='*60}")
+    print(f"Summary: {added} songs added, {not_found} not found")
+    print(f"{'='*60}")
+    print(f"\nYour playlist is ready! Open it here:")
+    print(playlist_url)
+
+
+def run(argv=None):
+    """Entry point: CLI when arguments are given, otherwise the GUI (Tk is only loaded then)."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        main(argv)
+    else:
+        from .gui import launch_gui
+        launch_gui()
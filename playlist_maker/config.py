@@ -0,0 +1,77 @@
+"""Settings shared by every module, mostly overridable through environment variables."""
+import os
+
+# Spotify API credentials - read from environment (recommended) with fallbacks
+CLIENT_ID = os.getenv('SPOTIPY_CLIENT_ID', 'b3dbd3bbe68d4f38bf3a735a0ec18b80')
+CLIENT_SECRET = os.getenv('SPOTIPY_CLIENT_SECRET', '4b59e772264149abbc31f3e8c3dd48e1')
+REDIRECT_URI = os.getenv('SPOTIPY_REDIRECT_URI', 'http://127.0.0.1:8000')
+
+# Number of searches kept in flight at once (override with PLAYLIST_SEARCH_CONCURRENCY)
+SEARCH_CONCURRENCY = int(os.getenv('PLAYLIST_SEARCH_CONCURRENCY', '8'))
+# Results of the most recently resolved distinct lines kept for duplicates later in
+# the same run; older duplicates are searched again, which the search cache answers
+SEARCH_RECENT_KEYS = 5000
+
+# Query planner: stop trying further queries once a candidate scores at least
+# MATCH_THRESHOLD; never accept a candidate scoring below MATCH_MIN_SCORE
+MATCH_THRESHOLD = 0.8
+MATCH_MIN_SCORE = 0.5
+
+# Spotify accepts at most 100 items per playlist add/remove request
+PLAYLIST_BATCH_SIZE = 100
+
+# Sharding splits bigger inputs into numbered playlists of at most this many
+# tracks (Spotify's per-playlist cap; override with PLAYLIST_SHARD_SIZE)
+PLAYLIST_MAX_TRACKS = int(os.getenv('PLAYLIST_SHARD_SIZE', '10000'))
+
+# Local state (search cache etc.) lives here unless overridden
+APP_DIR = os.getenv('PLAYLIST_APP_DIR', os.path.join(os.path.expanduser('~'), '.spotify_playlist_maker'))
+CACHE_PATH = os.getenv('PLAYLIST_CACHE_PATH', os.path.join(APP_DIR, 'search_cache.sqlite3'))
+CACHE_TTL = 30 * 24 * 3600          # found tracks are kept for 30 days
+CACHE_NEGATIVE_TTL = 24 * 3600      # "not found" answers are retried after a day
+CACHE_MAX_ENTRIES = 200000          # least recently used entries are evicted past this
+CATALOG_PATH = os.getenv('PLAYLIST_CATALOG_PATH', os.path.join(APP_DIR, 'catalog.sqlite3'))
+CATALOG_SCAN_LIMIT = 2000           # index rows read per token, so common words stay cheap
+JOURNAL_DIR = os.path.join(APP_DIR, 'journals')
+PREVIEW_DIR = os.path.join(APP_DIR, 'previews')
+PREVIEW_MAX_AGE = 24 * 3600         # Create reuses a saved preview of the same input up to a day old
+LOG_DIR = os.path.join(APP_DIR, 'logs')
+REPORT_DIR = os.path.join(APP_DIR, 'reports')
+WATCH_STATE_PATH = os.path.join(APP_DIR, 'watch.sqlite3')
+WATCH_INTERVAL = float(os.getenv('PLAYLIST_WATCH_INTERVAL', '2'))  # seconds between polls of a watched folder
+
+# Profiling mode (--profile / the GUI's "Profile" checkbox): stack sampling
+# period, the minimum gap between allocation snapshots at phase boundaries and
+# how many steps between snapshots the allocation report keeps
+PROFILE_INTERVAL = 0.005
+PROFILE_SNAPSHOT_INTERVAL = 1.0
+PROFILE_MAX_STEPS = 200
+
+# GUI log: pending output is drawn at most once per LOG_FLUSH_MS and the
+# window keeps only the last LOG_MAX_LINES lines
+LOG_FLUSH_MS = 50
+LOG_MAX_LINES = int(os.getenv('PLAYLIST_LOG_MAX_LINES', '5000'))
+PROGRESS_REFRESH_MS = 250
+
+
+# Statuses the HTTP session retries for every Spotify call, up to
+# SPOTIFY_HTTP_RETRIES times with backoff (see session.build_http_session). 429
+# is left out on purpose: safe_search and call_with_rate_limit see it and pause
+# every worker through the rate gate instead of one thread.
+SPOTIFY_RETRY_STATUSES = (500, 502, 503, 504)
+SPOTIFY_HTTP_RETRIES = 3
+SPOTIFY_RETRY_BACKOFF = 0.3
+RATE_LIMIT_RETRIES = 10       # 429s tolerated per search before giving up on the line
+TOKEN_REFRESH_MARGIN = 300    # refresh the access token this many seconds before it expires
+
+# A Retry-After seen by one process pauses every process using the same client
+# ID. PLAYLIST_RATE_LIMIT turns on a shared request budget as well (searches and
+# playlist calls): RATE_LIMIT_PER_SEC requests per second with bursts of up to
+# RATE_LIMIT_BURST. It is off (0) by default, since it would cap a single
+# process too; set it when several processes run against one client ID.
+# PLAYLIST_SHARED_RATE_LIMIT=0 turns the shared state off (pauses are then
+# shared between this process's workers only).
+RATE_LIMIT_PER_SEC = float(os.getenv('PLAYLIST_RATE_LIMIT', '0'))
+RATE_LIMIT_BURST = int(os.getenv('PLAYLIST_RATE_BURST', '10'))
+SHARED_RATE_LIMIT = os.getenv('PLAYLIST_SHARED_RATE_LIMIT', '1') != '0'
+RATE_GOVERNOR_PATH = os.path.join(APP_DIR, 'rate_budget.sqlite3')
@@ -0,0 +1,151 @@
+"""Progress events: typed records published on one bus that the front ends and metrics subscribe to."""
+import threading
+import time
+
+from .metrics import metrics
+
+# Event kinds and the fields each one carries
+LINE_PARSED = 'line_parsed'          # line, song, context
+SEARCH_STARTED = 'search_started'    # song, context
+SEARCH_FINISHED = 'search_finished'  # song, context, track (TrackMatch or None), error, api_calls, seconds
+RETRY = 'retry'                      # reason ('rate_limited' or 'error'), delay, attempt, retries, error
+BATCH_ADDED = 'batch_added'          # playlist_id, count, added (running total for that call)
+JOB_DONE = 'job_done'                # name, state, lines, api_calls, seconds, error
+LOG = 'log'                          # text
+
+KINDS = (LINE_PARSED, SEARCH_STARTED, SEARCH_FINISHED, RETRY, BATCH_ADDED, JOB_DONE, LOG)
+
+
+class Event:
+    """One published event: its kind, the Job it belongs to (or None), a timestamp and its fields.
+
+    Fields are readable as attributes, e.g. event.track for a SEARCH_FINISHED.
+    """
+
+    __slots__ = ('kind', 'job', 'time', 'fields')
+
+    def __init__(self, kind, job, fields):
+        self.kind = kind
+        self.job = job
+        self.time = time.monotonic()
+        self.fields = fields
+
+    def __getattr__(self, name):
+        try:
+            return self.fields[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, {self.fields!r})"
+
+
+class EventBus:
+    """Delivers events to subscribers synchronously, on the thread that emits them.
+
+    Subscriber lists are copied on (un)subscribe, so emit() takes no lock, and
+    a kind nobody listens to costs one dict lookup: no Event is built. Handlers
+    must be quick and thread-safe; one that needs to do real work (redraw a
+    window, say) should queue the event, e.g. through an EventBuffer. A handler
+    that raises is counted in event_handler_errors_total and otherwise ignored.
+
+    LOG text nobody subscribed to is printed, so the core functions still talk
+    to a terminal when used as a library. The job of an event defaults to the
+    one bound to the emitting thread (bind_job), which the job scheduler and
+    the search worker pools do for their threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = {}     # kind -> tuple of handlers
+        self._local = threading.local()
+
+    def subscribe(self, handler, kinds=None):
+        """Call handler(event) for every event of the given kinds (all kinds if None). Returns handler."""
+        with self._lock:
+            handlers = dict(self._handlers)
+            for kind in kinds or KINDS:
+                handlers[kind] = handlers.get(kind, ()) + (handler,)
+            self._handlers = handlers
+        return handler
+
+    def unsubscribe(self, handler):
+        with self._lock:
+            self._handlers = {kind: tuple(h for h in hs if h is not handler)
+                              for kind, hs in self._handlers.items()}
+
+    def wants(self, kind):
+        """True if anyone listens to kind; lets hot loops skip gathering fields for nobody."""
+        return bool(self._handlers.get(kind))
+
+    def bind_job(self, job):
+        """Attribute events emitted on this thread to job (None unbinds)."""
+        self._local.job = job
+
+    def current_job(self):
+        return getattr(self._local, 'job', None)
+
+    def emit(self, kind, job=None, **fields):
+        handlers = self._handlers.get(kind)
+        if not handlers:
+            if kind == LOG:
+                print(fields['text'])
+            return
+        event = Event(kind, job if job is not None else getattr(self._local, 'job', None), fields)
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception:
+                metrics.inc('event_handler_errors_total')
+
+    def log(self, text, job=None):
+        """Publish a line of text for the log (what used to be a print)."""
+        self.emit(LOG, job, text=text)
+
+
+class EventBuffer:
+    """Subscriber that queues events for a consumer draining them on its own schedule (e.g. the Tk thread).
+
+    Under load it holds at most max_events between drains and counts the rest
+    in dropped. Kinds listed in coalesce keep only their latest event per job,
+    which is all a progress display needs.
+    """
+
+    def __init__(self, max_events=10000, coalesce=()):
+        self.max_events = max_events
+        self.coalesce = frozenset(coalesce)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._events = []
+        self._latest = {}       # (kind, job) -> event, for coalesced kinds
+
+    def __call__(self, event):
+        with self._lock:
+            if event.kind in self.coalesce:
+                self._latest[event.kind, event.job] = event
+            elif len(self._events) < self.max_events:
+                self._events.append(event)
+            else:
+                self.dropped += 1
+
+    def drain(self):
+        """Queued events, oldest first, followed by the latest of each coalesced kind."""
+        with self._lock:
+            drained = self._events + list(self._latest.values())
+            self._events = []
+            self._latest = {}
+        return drained
+
+
+# Kinds the metrics exporter listens to; the per-line parse/start events are already counted in bulk
+METRIC_KINDS = (SEARCH_FINISHED, RETRY, BATCH_ADDED, JOB_DONE)
+
+
+def record_metrics(event):
+    """Subscriber for the metrics exporter: events per kind, and each line's queued plus search time."""
+    metrics.inc(f'events_{event.kind}_total')
+    if event.kind == SEARCH_FINISHED:
+        metrics.observe('search_line_seconds', event.seconds)
+
+
+events = EventBus()
@@ -0,0 +1,185 @@
+"""Rate limiting shared by every search worker, and by every process using the same client ID."""
+import os
+import sqlite3
+import threading
+import time
+
+from .config import (CLIENT_ID, RATE_GOVERNOR_PATH, RATE_LIMIT_BURST, RATE_LIMIT_PER_SEC, RATE_LIMIT_RETRIES,
+                     SHARED_RATE_LIMIT)
+from .events import RETRY, events
+from .metrics import metrics
+
+
+class RateLimitGate:
+    """Shared pause point so a 429 seen by one search worker holds back all of them.
+
+    In-process only; used when the cross-process RateGovernor is disabled or
+    its state file can't be opened.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._until = 0.0
+
+    def block(self, seconds):
+        """Hold every caller of wait() until `seconds` from now (never shortens a pause)."""
+        with self._lock:
+            self._until = max(self._until, time.monotonic() + seconds)
+
+    def wait(self):
+        """Sleep until any pause set by block() has passed."""
+        while True:
+            with self._lock:
+                remaining = self._until - time.monotonic()
+            if remaining <= 0:
+                return
+            metrics.inc('rate_limit_wait_seconds_total', remaining)
+            time.sleep(remaining)
+
+
+class RateGovernor:
+    """Token bucket and Retry-After pause shared by all processes using one client ID.
+
+    The state is a single SQLite row per client ID (tokens left, last refill,
+    paused until), updated in a short write transaction, so the CLI, cron jobs
+    and the GUI draw from one budget of `rate` requests per second with bursts
+    of up to `burst`. A caller takes its token straight away, even into debt,
+    and sleeps until the debt is paid off: requests leave at an even pace in
+    arrival order instead of everyone polling an empty bucket. A Retry-After
+    passed to block() pauses every process. rate=0 turns the bucket off and
+    only shares the pauses; wait() then just reads the deadline, without a
+    write transaction.
+    """
+
+    def __init__(self, path=RATE_GOVERNOR_PATH, key=CLIENT_ID, rate=RATE_LIMIT_PER_SEC, burst=RATE_LIMIT_BURST):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.key = key
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_budget ('
+            'client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, paused_until REAL NOT NULL)'
+        )
+        self._conn.execute('INSERT OR IGNORE INTO rate_budget VALUES (?, ?, ?, 0)', (key, float(self.burst), time.time()))
+
+    def _transaction(self, update):
+        """Run update(tokens, updated, paused_until, now) in a write transaction; it returns (new row values, result)."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                tokens, updated, paused_until = self._conn.execute(
+                    'SELECT tokens, updated, paused_until FROM rate_budget WHERE client = ?', (self.key,)
+                ).fetchone()
+                (tokens, updated, paused_until), result = update(tokens, updated, paused_until, time.time())
+                self._conn.execute(
+                    'UPDATE rate_budget SET tokens = ?, updated = ?, paused_until = ? WHERE client = ?',
+                    (tokens, updated, paused_until, self.key)
+                )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return result
+
+    def _paused_for(self):
+        """Seconds left of the shared pause, from a plain read (WAL readers don't block writers)."""
+        with self._lock:
+            paused_until, = self._conn.execute(
+                'SELECT paused_until FROM rate_budget WHERE client = ?', (self.key,)
+            ).fetchone()
+        return paused_until - time.time()
+
+    def _take(self, tokens, updated, paused_until, now):
+        if paused_until > now:
+            return (tokens, updated, paused_until), ('pause', paused_until - now)
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate) - 1
+        return (tokens, now, paused_until), ('budget', -tokens / self.rate if tokens < 0 else 0.0)
+
+    def wait(self):
+        """Take one request from the shared budget, sleeping for any pause or budget debt."""
+        while True:
+            if self.rate <= 0:
+                kind, delay = 'pause', self._paused_for()
+            else:
+                kind, delay = self._transaction(self._take)
+            if delay <= 0:
+                return
+            if kind == 'pause':
+                # no token was taken; check again once the pause is over, it may have been extended
+                metrics.inc('rate_limit_wait_seconds_total', delay)
+                time.sleep(delay)
+                continue
+            metrics.inc('rate_budget_wait_seconds_total', delay)
+            time.sleep(delay)
+            return
+
+    def block(self, seconds):
+        """Pause every process sharing this budget until `seconds` from now (never shortens a pause)."""
+        def update(tokens, updated, paused_until, now):
+            return (tokens, updated, max(paused_until, now + seconds)), None
+        self._transaction(update)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_gate = None
+_gate_lock = threading.Lock()
+
+
+def get_rate_gate():
+    """The process-wide gate: a RateGovernor unless disabled or unavailable, else a RateLimitGate.
+
+    Created on first use, so importing the package never touches the state file.
+    """
+    global _gate
+    if _gate is None:
+        with _gate_lock:
+            if _gate is None:
+                gate = None
+                if SHARED_RATE_LIMIT:
+                    try:
+                        gate = RateGovernor()
+                    except (OSError, sqlite3.Error) as e:
+                        events.log(f"Shared rate limit unavailable ({e}); limiting this process only.")
+                _gate = gate or RateLimitGate()
+    return _gate
+
+
+def set_rate_gate(gate):
+    """Replace the process-wide gate (e.g. a RateGovernor with another rate or file)."""
+    global _gate
+    with _gate_lock:
+        _gate = gate
+
+
+def call_with_rate_limit(fn, *args, **kwargs):
+    """Call a Spotify endpoint other than search through the shared gate, waiting out 429s like safe_search does.
+
+    Used for playlist writes, playlist creation and the paged reads; 5xx
+    answers are already retried by the HTTP session.
+    """
+    from spotipy.exceptions import SpotifyException
+
+    gate = get_rate_gate()
+    rate_limited = 0
+    while True:
+        gate.wait()
+        try:
+            return fn(*args, **kwargs)
+        except SpotifyException as e:
+            rate_limited += 1
+            if getattr(e, 'http_status', None) != 429 or rate_limited > RATE_LIMIT_RETRIES:
+                raise
+            retry_after = int((getattr(e, 'headers', None) or {}).get('Retry-After', 1))
+            metrics.inc('spotify_write_rate_limited_total')
+            events.emit(RETRY, reason='rate_limited', delay=retry_after, attempt=rate_limited,
+                        retries=RATE_LIMIT_RETRIES, error=e)
+            gate.block(retry_after)
@@ -0,0 +1,1044 @@
+"""Tkinter GUI. Only imported when the app is started without arguments."""
+import hashlib
+import os
+import threading
+import time
+import tkinter as tk
+from array import array
+from tkinter import filedialog, scrolledtext, messagebox, ttk
+
+from .cache import SearchCache, open_search_cache
+from .catalog import open_catalog
+from .config import LOG_DIR, LOG_FLUSH_MS, LOG_MAX_LINES, PLAYLIST_MAX_TRACKS, PROGRESS_REFRESH_MS
+from .events import (JOB_DONE, LOG, METRIC_KINDS, RETRY, SEARCH_FINISHED, EventBuffer, events,
+                     record_metrics)
+from .governor import call_with_rate_limit
+from .jobs import Job, JobCancelled, JobScheduler
+from .journal import JobJournal, journal_path_for
+from .metrics import metrics
+from .parser import parse_text, read_songs_from_file, source_line_numbers
+from .playlist import (add_preview_matches, add_tracks_in_batches, open_playlist_job, search_and_add_songs,
+                       sync_existing_playlist)
+from .preview import PreviewArtifact, PreviewWriter, find_fresh_preview, input_hash, save_exclusions
+from .profiling import Profiler, phase
+from .progress import describe_event
+from .search import ResultStore, SearchStats, format_line, search_songs
+from .session import create_spotify_client, current_user, get_session
+from .shard import ShardPlan, create_sharded, plan_from_preview, plan_from_search
+
+
+class GuiLogBuffer:
+    """Collects log text from any thread and draws it into a Tk text widget in batches.
+
+    write() only appends to a list under a lock; the Tk thread flushes it every
+    flush_ms with a single insert, trims the widget to max_lines and scrolls once.
+    With a spill file set, everything written is also appended to that file.
+    """
+
+    def __init__(self, root, widget, flush_ms=LOG_FLUSH_MS, max_lines=LOG_MAX_LINES):
+        self.root = root
+        self.widget = widget
+        self.flush_ms = flush_ms
+        self.max_lines = max_lines
+        self._pending = []
+        self._lock = threading.Lock()
+        self._spill = None
+        self._schedule()
+
+    def write(self, text):
+        if text:
+            with self._lock:
+                self._pending.append(text)
+
+    def set_spill_file(self, path):
+        """Also append all log output to path; None stops spilling."""
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+            if path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._spill = open(path, 'a', encoding='utf-8')
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+        self.widget.configure(state='normal')
+        self.widget.delete('1.0', 'end')
+        self.widget.configure(state='disabled')
+
+    def _schedule(self):
+        self.root.after(self.flush_ms, self._tick)
+
+    def _tick(self):
+        try:
+            if self._pending:
+                with phase('log render'):
+                    self.flush()
+        finally:
+            self._schedule()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            text = ''.join(self._pending)
+            self._pending = []
+            if self._spill is not None:
+                self._spill.write(text)
+                self._spill.flush()
+        metrics.inc('gui_log_flushes_total')
+
+        lines = text.count('\n')
+        if lines > self.max_lines:
+            # only the tail would survive the trim below, so don't insert the rest
+            text = '\n'.join(text.split('\n')[-self.max_lines - 1:])
+        w = self.widget
+        w.configure(state='normal')
+        w.insert('end', text)
+        # a Text widget always holds one trailing empty line after the last newline
+        excess = int(w.index('end-1c').split('.')[0]) - 1 - self.max_lines
+        if excess > 0:
+            w.delete('1.0', f'{excess + 1}.0')
+        w.see('end')
+        w.configure(state='disabled')
+
+
+class PreviewTable(tk.Frame):
+    """Sortable match table that only creates Treeview items for the rows on screen.
+
+    Results live in a ResultStore, with a bytearray of include flags and an
+    array holding the current sort order; the Treeview holds one item per
+    visible slot and scrolling just rewrites those items. add() may be called
+    from any thread; pending rows are merged on the Tk thread every flush_ms.
+    Not-found rows have no URI and can't be included.
+    """
+
+    COLUMNS = (('use', 'Use', 40), ('line', '#', 60), ('input', 'Input', 200),
+               ('track', 'Matched track', 180), ('artist', 'Artist', 130),
+               ('score', 'Score', 60), ('uri', 'URI', 250))
+
+    def __init__(self, master, flush_ms=LOG_FLUSH_MS, on_change=None):
+        super().__init__(master)
+        self.store = ResultStore()
+        self.include = bytearray()
+        self.order = array('L')
+        self.flush_ms = flush_ms
+        self.on_change = on_change
+        self.offset = 0
+        self.sort_col = None
+        self.sort_reverse = False
+        self._pending = []
+        self._lock = threading.Lock()
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in self.COLUMNS], show='headings', height=1)
+        for index, (name, title, width) in enumerate(self.COLUMNS):
+            self.tree.heading(name, text=title, command=lambda i=index: self.sort_by(i))
+            self.tree.column(name, width=width, stretch=name in ('input', 'track', 'uri'))
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.slots = []
+
+        self.tree.bind('<Configure>', lambda e: self._resize(e.height))
+        self.tree.bind('<MouseWheel>', lambda e: self._on_scroll('scroll', -3 if e.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda e: self._on_scroll('scroll', -3))
+        self.tree.bind('<Button-5>', lambda e: self._on_scroll('scroll', 3))
+        self.tree.bind('<Prior>', lambda e: self._on_scroll('scroll', -1, 'pages'))
+        self.tree.bind('<Next>', lambda e: self._on_scroll('scroll', 1, 'pages'))
+        self.tree.bind('<Double-1>', lambda e: self.toggle_selected())
+        self.tree.bind('<space>', lambda e: self.toggle_selected())
+        self.after(self.flush_ms, self._tick)
+
+    def add(self, line_no, text, match=None):
+        """Queue one line's result (a TrackMatch, or None if not found)."""
+        with self._lock:
+            self._pending.append((line_no, text, match))
+
+    def _tick(self):
+        if not self.winfo_exists():
+            return
+        try:
+            if self._pending:
+                with phase('preview render'):
+                    self.flush()
+        finally:
+            self.after(self.flush_ms, self._tick)
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+        # while sorted, a few new rows go straight to their place; re-sorting everything
+        # on every tick would cost O(n log n) per frame on a big live preview
+        insert = self.sort_col is not None and len(pending) * 8 < len(self.order)
+        key = self._sort_key(self.sort_col) if insert else None
+        for line_no, text, match in pending:
+            row = len(self.store)
+            self.store.append(line_no, text, match)
+            self.include.append(match is not None)
+            if insert:
+                self._insert_sorted(row, key)
+            else:
+                self.order.append(row)
+        if self.sort_col is not None and not insert:
+            self._sort()
+        self.refresh()
+        if self.on_change:
+            self.on_change()
+
+    def _sort_key(self, col):
+        st = self.store
+        if col == 0:
+            return self.include.__getitem__
+        column = (None, st.line_nos, st.inputs, st.names, st.artists, st.scores, st.uris)[col]
+        if col in (1, 5):
+            return column.__getitem__
+        return lambda i: column[i].casefold()
+
+    def _sort(self):
+        self.order = array('L', sorted(self.order, key=self._sort_key(self.sort_col), reverse=self.sort_reverse))
+
+    def _insert_sorted(self, row, key):
+        """Binary-insert a new row into order, after rows with an equal key, as a stable sort would."""
+        order = self.order
+        k = key(row)
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = key(order[mid])
+            if (other < k) if self.sort_reverse else (other > k):
+                hi = mid
+            else:
+                lo = mid + 1
+        order.insert(lo, row)
+
+    def sort_by(self, col):
+        """Sort on a column; clicking the same heading again reverses the order."""
+        self.sort_reverse = not self.sort_reverse if col == self.sort_col else False
+        self.sort_col = col
+        self._sort()
+        self.offset = 0
+        self._clear_selection()
+        self.refresh()
+
+    def _resize(self, height):
+        rowheight = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        wanted = max(1, height // rowheight - 1)
+        while len(self.slots) < wanted:
+            self.slots.append(self.tree.insert('', 'end', values=()))
+        while len(self.slots) > wanted:
+            self.tree.delete(self.slots.pop())
+        self.refresh()
+
+    def _on_scroll(self, action, amount, unit=None):
+        self._clear_selection()
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.order))
+            self.refresh()
+        else:
+            step = len(self.slots) if unit == 'pages' else 1
+            self._scroll_by(int(amount) * step)
+        return 'break'
+
+    def _scroll_by(self, delta):
+        self.offset += delta
+        self.refresh()
+        return 'break'
+
+    def _clear_selection(self):
+        # selection belongs to slots, not rows, so it would point elsewhere once the view moves
+        self.tree.selection_remove(self.tree.selection())
+
+    def refresh(self):
+        """Redraw the visible slots from order[offset:]."""
+        total = len(self.order)
+        self.offset = max(0, min(self.offset, total - len(self.slots)))
+        for slot, iid in enumerate(self.slots):
+            i = self.offset + slot
+            if i < total:
+                row = self.order[i]
+                line_no, text, track, artist, score, uri = self.store.row(row)
+                mark = ('✓' if self.include[row] else '') if uri else '✗'
+                shown = '' if score is None else f'{score:.2f}'
+                self.tree.item(iid, values=(mark, line_no, text, track, artist, shown, uri))
+            else:
+                self.tree.item(iid, values=())
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(self.slots)) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def toggle_selected(self):
+        for iid in self.tree.selection():
+            i = self.offset + self.slots.index(iid)
+            if i < len(self.order):
+                row = self.order[i]
+                if self.store.uris[row]:
+                    self.include[row] = not self.include[row]
+        self.refresh()
+        if self.on_change:
+            self.on_change()
+        return 'break'
+
+    def set_all(self, include):
+        for row, uri in enumerate(self.store.uris):
+            if uri:
+                self.include[row] = include
+        self.refresh()
+        if self.on_change:
+            self.on_change()
+
+    def counts(self):
+        """(included, matched, not found) over the rows added so far."""
+        matched = self.store.found_count()
+        return sum(self.include), matched, len(self.store) - matched
+
+    def included_uris(self):
+        """URIs of included rows in input order, whatever the current sort."""
+        return [uri for uri, use in zip(self.store.uris, self.include) if use and uri]
+
+    def excluded_lines(self):
+        """Line numbers of matched rows that are currently excluded."""
+        store = self.store
+        return [store.line_nos[i] for i, (uri, use) in enumerate(zip(store.uris, self.include)) if uri and not use]
+
+def launch_gui():
+    root = tk.Tk()
+    root.title("Spotify Playlist Creator")
+    root.geometry("760x600")
+
+    # Top frame for inputs
+    frame = tk.Frame(root)
+    frame.pack(fill='x', padx=10, pady=8)
+
+    tk.Label(frame, text="Song file:").grid(row=0, column=0, sticky='w')
+    file_var = tk.StringVar()
+    file_entry = tk.Entry(frame, textvariable=file_var, width=70)
+    file_entry.grid(row=0, column=1, sticky='w')
+
+    def browse_file():
+        path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            file_var.set(path)
+            # set default playlist name if empty
+            if not playlist_name_var.get():
+                playlist_name_var.set(os.path.splitext(os.path.basename(path))[0].replace('_', ' '))
+
+    tk.Button(frame, text="Browse", command=browse_file).grid(row=0, column=2, padx=6)
+
+    tk.Label(frame, text="Playlist name:").grid(row=1, column=0, sticky='w')
+    playlist_name_var = tk.StringVar()
+    playlist_entry = tk.Entry(frame, textvariable=playlist_name_var, width=70)
+    playlist_entry.grid(row=1, column=1, sticky='w')
+
+    public_var = tk.BooleanVar(value=True)
+    tk.Checkbutton(frame, text="Public", variable=public_var).grid(row=2, column=1, sticky='w')
+
+    # Ensure use_filename_var and its handler exist (guard in case of previous edits changing order)
+    try:
+        use_filename_var
+    except NameError:
+        use_filename_var = tk.BooleanVar(value=True)
+        def on_use_filename_changed(*_):
+            use_fn = use_filename_var.get()
+            if use_fn:
+                p = file_var.get().strip()
+                if p:
+                    playlist_name_var.set(os.path.splitext(os.path.basename(p))[0].replace('_', ' '))
+                playlist_entry.configure(state='disabled')
+            else:
+                playlist_entry.configure(state='normal')
+
+    # Manual entry option: allow user to type/paste song lines instead of using a file
+    manual_var = tk.BooleanVar(value=False)
+    def on_manual_changed(*_):
+        is_manual = manual_var.get()
+        # Enable/disable file controls
+        for child in frame.winfo_children():
+            try:
+                if isinstance(child, tk.Entry) and child is file_entry:
+                    child.configure(state='disabled' if is_manual else 'normal')
+                if isinstance(child, tk.Button) and child.cget('text') == 'Browse':
+                    child.configure(state='disabled' if is_manual else 'normal')
+            except Exception:
+                pass
+        # Show/hide manual text widget
+        if is_manual:
+            manual_label.grid(row=3, column=0, sticky='nw', pady=(6,0))
+            manual_text.grid(row=3, column=1, columnspan=2, sticky='we', pady=(6,0))
+            playlist_entry.configure(state='normal')
+            use_filename_var.set(False)
+            on_use_filename_changed()
+        else:
+            manual_label.grid_remove()
+            manual_text.grid_remove()
+            on_use_filename_changed()
+
+    tk.Checkbutton(frame, text='Manual entries (paste lines)', variable=manual_var, command=on_manual_changed).grid(row=2, column=3, sticky='e')
+
+    manual_label = tk.Label(frame, text='Manual songs (one per line, format: Song – Artist)')
+    manual_text = scrolledtext.ScrolledText(frame, height=6)
+    manual_label.grid_remove()
+    manual_text.grid_remove()
+
+    def get_songs_from_inputs(filepath):
+        """Return list of (song, context) from manual text if enabled, else from file path."""
+        if manual_var.get():
+            text = manual_text.get('1.0', 'end')
+            songs = parse_text(text)
+            return songs
+        # else fallback to file
+        return read_songs_from_file(filepath)
+
+    # Dark theme toggle
+    dark_theme_var = tk.BooleanVar(value=False)
+
+    def apply_theme(is_dark: bool, widget_root=None):
+        """Apply dark or light theme to all widgets by walking the widget tree.
+        This avoids referencing outer variables that may not be bound yet.
+        """
+        bg = '#2e2e2e' if is_dark else 'SystemButtonFace'
+        fg = '#ffffff' if is_dark else 'black'
+        entry_bg = '#3a3a3a' if is_dark else 'white'
+        txt_bg = '#1e1e1e' if is_dark else 'white'
+        btn_bg = '#4CAF50' if is_dark else '#4CAF50'
+        preview_btn_bg = '#1976D2' if is_dark else '#2196F3'
+
+        roots = [root]
+        if widget_root:
+            roots.append(widget_root)
+
+        def walk_and_style(w):
+            # Try to set generic background for frames/windows
+            try:
+                if isinstance(w, (tk.Tk, tk.Toplevel, tk.Frame)):
+                    w.configure(bg=bg)
+            except Exception:
+                pass
+
+            # Style specific widget types
+            try:
+                if isinstance(w, tk.Label):
+                    w.configure(bg=bg, fg=fg)
+                elif isinstance(w, tk.Entry):
+                    w.configure(bg=entry_bg, fg=fg, insertbackground=fg)
+                elif isinstance(w, tk.Checkbutton):
+                    w.configure(bg=bg, fg=fg, selectcolor=bg)
+                elif isinstance(w, tk.Button):
+                    # Try to detect preview button by its text
+                    txt = ''
+                    try:
+                        txt = w.cget('text')
+                    except Exception:
+                        txt = ''
+                    if 'Preview' in txt:
+                        w.configure(bg=preview_btn_bg, fg='white')
+                    else:
+                        w.configure(bg=btn_bg, fg='white')
+                elif isinstance(w, scrolledtext.ScrolledText):
+                    w.configure(bg=txt_bg, fg=fg, insertbackground=fg)
+            except Exception:
+                pass
+
+            # Recurse into children
+            try:
+                for child in w.winfo_children():
+                    walk_and_style(child)
+            except Exception:
+                pass
+
+        for r in roots:
+            walk_and_style(r)
+
+        # ensure the main log widget uses txt colors if present
+        try:
+            log.configure(bg=txt_bg, fg=fg, insertbackground=fg)
+        except Exception:
+            pass
+
+    def on_dark_theme_changed():
+        apply_theme(dark_theme_var.get())
+
+    tk.Checkbutton(frame, text='Dark theme', variable=dark_theme_var, command=on_dark_theme_changed).grid(row=2, column=2, sticky='w')
+
+    # ensure initial state
+    on_use_filename_changed()
+    apply_theme(dark_theme_var.get())
+
+    # update browse_file to respect use_filename_var
+    _old_browse = browse_file
+    def _browse_and_update():
+        _old_browse()
+        if use_filename_var.get():
+            p = file_var.get().strip()
+            if p:
+                playlist_name_var.set(os.path.splitext(os.path.basename(p))[0].replace('_', ' '))
+    # replace the button command
+    # find the Browse button (it's the last added in frame children) and rebind
+    try:
+        # brute-force: iterate frame children to find the Button with text 'Browse'
+        for child in frame.winfo_children():
+            if isinstance(child, tk.Button) and child.cget('text') == 'Browse':
+                child.configure(command=_browse_and_update)
+                break
+    except Exception:
+        pass
+
+    # Buttons frame: actions on one row, the options in a grid below it
+    buttons = tk.Frame(root)
+    buttons.pack(fill='x', padx=10)
+    options = tk.Frame(root)
+    options.pack(fill='x', padx=10, pady=(6, 0))
+    option_count = [0]
+
+    def add_option(text, variable, columns=3):
+        """Place a checkbox in the next cell of the options grid."""
+        row, column = divmod(option_count[0], columns)
+        option_count[0] += 1
+        tk.Checkbutton(options, text=text, variable=variable).grid(row=row, column=column, sticky='w', padx=(0, 12))
+
+    start_btn = tk.Button(buttons, text="Create Playlist", bg='#4CAF50', fg='white')
+    start_btn.pack(side='left')
+
+    clear_btn = tk.Button(buttons, text="Clear Log")
+    clear_btn.pack(side='left', padx=6)
+
+    # Preview button
+    preview_btn = tk.Button(buttons, text="Preview Matches", bg='#2196F3', fg='white')
+    preview_btn.pack(side='left', padx=6)
+
+    # Search cache controls
+    use_cache_var = tk.BooleanVar(value=True)
+    add_option('Use search cache', use_cache_var)
+
+    clear_cache_btn = tk.Button(buttons, text="Clear Cache")
+    clear_cache_btn.pack(side='left', padx=6)
+
+    # Local track catalog controls
+    use_catalog_var = tk.BooleanVar(value=True)
+    add_option('Use local catalog', use_catalog_var)
+
+    import_catalog_btn = tk.Button(buttons, text="Import Catalog")
+    import_catalog_btn.pack(side='left', padx=6)
+
+    export_metrics_btn = tk.Button(buttons, text="Export Metrics")
+    export_metrics_btn.pack(side='left', padx=6)
+
+    resume_var = tk.BooleanVar(value=False)
+    add_option('Resume previous job', resume_var)
+
+    sync_var = tk.BooleanVar(value=False)
+    add_option('Update existing playlist', sync_var)
+
+    shard_var = tk.BooleanVar(value=False)
+    add_option(f'Split into playlists of {PLAYLIST_MAX_TRACKS}', shard_var)
+
+    spill_var = tk.BooleanVar(value=False)
+    add_option('Save full log to file', spill_var)
+
+    # Log area
+    log = scrolledtext.ScrolledText(root, state='disabled', height=22)
+    log.pack(fill='both', expand=True, padx=10, pady=10)
+    log_buffer = GuiLogBuffer(root, log)
+
+    def write_log(msg: str):
+        """Queue a line for the log; safe to call from worker threads."""
+        log_buffer.write(msg if msg.endswith('\n') else msg + '\n')
+
+    def clear_log():
+        log_buffer.clear()
+
+    clear_btn.configure(command=clear_log)
+
+    def toggle_spill():
+        if not spill_var.get():
+            log_buffer.set_spill_file(None)
+            return
+        path = os.path.join(LOG_DIR, time.strftime('gui-%Y%m%d-%H%M%S.log'))
+        try:
+            log_buffer.set_spill_file(path)
+            write_log(f'✓ Saving full log to {path}')
+        except OSError as e:
+            spill_var.set(False)
+            write_log(f'Error opening log file: {e}')
+
+    spill_var.trace_add('write', lambda *_: toggle_spill())
+
+    profile_var = tk.BooleanVar(value=False)
+    add_option('Profile', profile_var)
+    profiler = {'active': None}
+
+    def toggle_profile():
+        """Profile everything from now until unchecked, then write the reports next to the logs."""
+        if profile_var.get():
+            profiler['active'] = Profiler().start()
+            write_log('Profiling; uncheck "Profile" to write the reports')
+            return
+        active, profiler['active'] = profiler['active'], None
+        if active is None:
+            return
+        try:
+            write_log(f'✓ Profile written to {active.stop()} (stacks.txt, phases.txt, allocations.txt)')
+        except OSError as e:
+            write_log(f'Error writing profile: {e}')
+
+    profile_var.trace_add('write', lambda *_: toggle_profile())
+
+    # Job progress: create/preview jobs run through one scheduler and report here
+    progress_frame = tk.Frame(root)
+    progress_frame.pack(fill='x', padx=10, before=log)
+    progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=1.0)
+    progress_bar.pack(side='left', fill='x', expand=True)
+    cancel_btn = tk.Button(progress_frame, text='Cancel', state='disabled')
+    cancel_btn.pack(side='left', padx=6)
+    progress_label = tk.Label(root, text='Idle', anchor='w')
+    progress_label.pack(fill='x', padx=10, before=log)
+
+    scheduler = JobScheduler()
+    cancel_btn.configure(command=scheduler.cancel_all)
+
+    def log_event(event):
+        """Bus subscriber: log text from the core functions and jobs, tagged by job while several run."""
+        text = describe_event(event, detail=True)
+        if text is None:
+            return
+        if event.job is not None and len(scheduler.running) > 1:
+            tag = f"[{event.job.name}] "
+            text = tag + text.replace('\n', '\n' + tag)
+        log_buffer.write(text + '\n')
+
+    events.subscribe(log_event, (LOG, SEARCH_FINISHED, RETRY, JOB_DONE))
+    events.subscribe(record_metrics, METRIC_KINDS)
+    # the progress label only needs the latest result and retry per job, however fast they come
+    status_events = events.subscribe(EventBuffer(coalesce=(SEARCH_FINISHED, RETRY)), (SEARCH_FINISHED, RETRY))
+    last_status = {}    # (job, kind) -> latest event
+
+    def job_status(job):
+        """Job progress plus its last search result and any rate-limit wait still in progress."""
+        text = job.describe()
+        retry = last_status.get((job, RETRY))
+        if retry is not None and time.monotonic() - retry.time < retry.delay:
+            text += f", waiting {retry.delay:.0f}s ({'rate limited' if retry.reason == 'rate_limited' else 'retrying'})"
+        found = last_status.get((job, SEARCH_FINISHED))
+        if found is not None:
+            text += f", last: {format_line(found.song, found.context)[:40]} {'✓' if found.track else '✗'}"
+        return text
+
+    def update_progress():
+        for event in status_events.drain():
+            last_status[event.job, event.kind] = event
+        jobs = scheduler.jobs()
+        running = [j for j in jobs if j.state == 'running']
+        if running:
+            done, total, _rate, _eta, _calls = running[0].progress()
+            if total:
+                progress_bar.configure(mode='determinate', value=min(1.0, done / total))
+            else:
+                progress_bar.configure(mode='indeterminate')
+                progress_bar.step(0.05)
+            text = ' | '.join(job_status(j) for j in running)
+            if len(jobs) > len(running):
+                text += f' | {len(jobs) - len(running)} queued'
+            progress_label.configure(text=text)
+            cancel_btn.configure(state='normal')
+        else:
+            last_status.clear()
+            progress_bar.configure(mode='determinate', value=0)
+            progress_label.configure(text='Idle')
+            cancel_btn.configure(state='disabled')
+        root.after(PROGRESS_REFRESH_MS, update_progress)
+
+    update_progress()
+
+    def warm_up_session():
+        """Log in and open a connection in the background so Preview/Create start searching at once."""
+        try:
+            if get_session().warm_up():
+                write_log('Spotify session ready')
+        except Exception as e:
+            write_log(f'Spotify warm-up skipped: {e}')
+
+    threading.Thread(target=warm_up_session, daemon=True).start()
+
+    def clear_cache():
+        if not messagebox.askyesno('Clear cache', 'Delete all cached search results?'):
+            return
+        try:
+            cache = SearchCache()
+            cache.clear()
+            cache.close()
+            write_log('✓ Cleared search cache')
+        except Exception as e:
+            write_log(f'Error clearing search cache: {e}')
+
+    clear_cache_btn.configure(command=clear_cache)
+
+    def import_catalog():
+        paths = filedialog.askopenfilenames(
+            title='Import tracks into the local catalog',
+            filetypes=[("Exports", "*.csv *.tsv *.jsonl *.ndjson *.json"), ("All files", "*.*")]
+        )
+        if not paths:
+            return
+
+        def worker(job):
+            catalog = open_catalog()
+            if catalog is None:
+                return
+            try:
+                for path in paths:
+                    job.check()
+                    try:
+                        added, skipped = catalog.import_file(path)
+                        events.log(f"✓ Imported {added} tracks from {path} ({skipped} skipped or already known)")
+                    except (OSError, ValueError) as e:
+                        events.log(f"Error importing {path}: {e}")
+                    job.advance()
+                events.log(f"Track catalog: {len(catalog)} tracks")
+            finally:
+                catalog.close()
+
+        scheduler.submit(Job('Import catalog', worker, total=len(paths)))
+
+    import_catalog_btn.configure(command=import_catalog)
+
+    def export_metrics():
+        path = filedialog.asksaveasfilename(
+            defaultextension='.json',
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            metrics.export(path)
+            write_log(f'✓ Metrics written to {path}')
+        except Exception as e:
+            write_log(f'Error writing metrics: {e}')
+
+    export_metrics_btn.configure(command=export_metrics)
+
+    def start_process():
+        filepath = file_var.get().strip()
+        if not manual_var.get() and not filepath:
+            messagebox.showerror("Missing file", "Please select a song file to continue.")
+            return
+        if not manual_var.get() and not os.path.exists(filepath):
+            messagebox.showerror("File not found", "The selected file does not exist.")
+            return
+
+        playlist_name = playlist_name_var.get().strip() or os.path.splitext(os.path.basename(filepath))[0].replace('_', ' ')
+        public = public_var.get()
+        use_cache = use_cache_var.get()
+        use_catalog = use_catalog_var.get()
+        resume = resume_var.get()
+        sync = sync_var.get()
+        shard = shard_var.get()
+        if manual_var.get():
+            # manual jobs are identified by their text so the same paste resumes the same job
+            manual_digest = hashlib.sha1(manual_text.get('1.0', 'end').strip().encode('utf-8')).hexdigest()
+            journal_source = f"manual:{manual_digest}"
+        else:
+            journal_source = filepath
+
+        start_btn.configure(state='disabled')
+
+        def worker(job):
+            cache = None
+            catalog = None
+            journal = None
+            try:
+                events.log('=' * 60)
+                events.log('Starting playlist creation...')
+                songs = get_songs_from_inputs(filepath)
+                if not songs:
+                    events.log('No songs found or error reading input!')
+                    return
+                job.total = len(songs)
+                # a finished preview of the same lines saves searching them again
+                artifact = find_fresh_preview(songs) if use_cache else None
+
+                sp = create_spotify_client()
+                job.check()
+
+                if sync:
+                    # playlist name field may hold a name, ID or URL of the playlist to update
+                    sync_existing_playlist(sp, playlist_name, songs, concurrency=job.concurrency,
+                                           use_cache=use_cache, job=job, use_catalog=use_catalog, artifact=artifact)
+                    return
+
+                if shard:
+                    # everything is resolved first so the shard count is known, then shards fill in parallel
+                    if artifact is not None:
+                        plan = plan_from_preview(artifact)
+                    else:
+                        cache = open_search_cache(use_cache)
+                        catalog = open_catalog(use_catalog)
+                        plan = plan_from_search(sp, songs, concurrency=job.concurrency, cache=cache,
+                                                catalog=catalog, job=job)
+                    job.check()
+                    create_sharded(sp, plan, playlist_name, public, f'Created from {filepath}', job=job)
+                    return
+
+                journal = JobJournal(journal_path_for(journal_source, playlist_name))
+                playlist_id, playlist_url = open_playlist_job(sp, playlist_name, public, f'Created from {filepath}',
+                                                              journal=journal, resume=resume, source=journal_source)
+
+                if artifact is not None:
+                    added, not_found = add_preview_matches(sp, playlist_id, artifact, journal=journal, job=job)
+                else:
+                    cache = open_search_cache(use_cache)
+                    catalog = open_catalog(use_catalog)
+                    added, not_found = search_and_add_songs(sp, playlist_id, songs, concurrency=job.concurrency,
+                                                            cache=cache, journal=journal, job=job, catalog=catalog)
+                events.log(f"\n{'='*60}")
+                events.log(f"Summary: {added} songs added, {not_found} not found")
+                events.log(f"{'='*60}")
+                events.log(f"Your playlist is ready! Open it here:")
+                events.log(playlist_url)
+
+            except JobCancelled:
+                if journal is not None:
+                    events.log("Stopped. Check 'Resume previous job' and create again to continue this playlist.")
+                raise
+            except Exception as e:
+                events.log(f"Error during operation: {e}")
+            finally:
+                if journal is not None:
+                    journal.close()
+                if cache is not None:
+                    cache.close()
+                if catalog is not None:
+                    catalog.close()
+                root.after(0, lambda: start_btn.configure(state='normal'))
+
+        scheduler.submit(Job('Create playlist', worker))
+
+    start_btn.configure(command=start_process)
+
+    def create_playlist_with_uris(job, sp_obj, playlist_name, public_flag, source_path, uris):
+        """Create a playlist and add the provided URIs. Runs as a scheduler job."""
+        job.total = len(uris)
+        try:
+            job.check()
+            events.log('=' * 60)
+            events.log('Creating playlist from preview...')
+            user = current_user(sp_obj)
+            events.log(f"Logged in as: {user.get('display_name')}")
+
+            playlist = call_with_rate_limit(
+                sp_obj.user_playlist_create,
+                user=user['id'],
+                name=playlist_name,
+                public=public_flag,
+                description=f'Created from {source_path} (preview)'
+            )
+
+            events.log(f"Created playlist: {playlist_name}")
+            events.log(f"Playlist URL: {playlist['external_urls']['spotify']}")
+
+            # Add tracks in batches
+            added = add_tracks_in_batches(sp_obj, playlist['id'], uris)
+            job.advance(len(uris))
+            events.log(f"\n✓ Successfully added {added} songs to the playlist!")
+            events.log(f"Your playlist is ready! Open it here:")
+            events.log(playlist['external_urls']['spotify'])
+
+        except JobCancelled:
+            raise
+        except Exception as e:
+            events.log(f"Error creating playlist from preview: {e}")
+        finally:
+            root.after(0, lambda: start_btn.configure(state='normal'))
+
+    def create_shards_with_plan(job, sp_obj, plan, playlist_name, public_flag, source_path):
+        """Create numbered playlists from a preview's ShardPlan. Runs as a scheduler job."""
+        job.total = len(plan.lines)
+        try:
+            events.log('=' * 60)
+            events.log('Creating playlists from preview...')
+            create_sharded(sp_obj, plan, playlist_name, public_flag, f'Created from {source_path} (preview)', job=job)
+            job.advance(len(plan.lines))
+        except JobCancelled:
+            raise
+        except Exception as e:
+            events.log(f"Error creating playlists from preview: {e}")
+        finally:
+            root.after(0, lambda: start_btn.configure(state='normal'))
+
+    def preview_matches():
+        filepath = file_var.get().strip()
+        if not manual_var.get() and not filepath:
+            messagebox.showerror("Missing file", "Please select a song file to continue.")
+            return
+        if not manual_var.get() and not os.path.exists(filepath):
+            messagebox.showerror("File not found", "The selected file does not exist.")
+            return
+
+        playlist_name = playlist_name_var.get().strip() or os.path.splitext(os.path.basename(filepath))[0].replace('_', ' ')
+        public = public_var.get()
+        use_cache = use_cache_var.get()
+        use_catalog = use_catalog_var.get()
+        source = 'manual' if manual_var.get() else filepath
+
+        preview_btn.configure(state='disabled')
+
+        # The window opens now and fills in as results arrive
+        pv = tk.Toplevel(root)
+        pv.title('Preview Matches')
+        pv.geometry('900x480')
+
+        info = tk.Label(pv, text=f"Preview for playlist: {playlist_name} — searching...")
+        info.pack(anchor='w', padx=8, pady=6)
+        state = {'sp': None, 'done': False, 'artifact': None}
+
+        def update_info():
+            included, matched, missing = table.counts()
+            status = 'done' if state['done'] else 'searching...'
+            info.configure(text=f"Preview for playlist: {playlist_name} — {matched} matches "
+                                f"({included} included), {missing} not found — {status}")
+
+        table = PreviewTable(pv, on_change=update_info)
+        table.pack(fill='both', expand=True, padx=8, pady=6)
+
+        btn_frame = tk.Frame(pv)
+        btn_frame.pack(fill='x', padx=8, pady=8)
+
+        def save_selection():
+            # later Create runs on the same input reuse the saved preview, minus excluded rows
+            if state['artifact'] is not None:
+                try:
+                    save_exclusions(state['artifact'], table.excluded_lines())
+                except OSError as e:
+                    write_log(f"Error saving preview selection: {e}")
+
+        def create_from_preview():
+            uris = table.included_uris()
+            if not uris:
+                messagebox.showinfo('No matches', 'No included tracks to create a playlist from.')
+                return
+            save_selection()
+            if shard_var.get() or len(uris) > PLAYLIST_MAX_TRACKS:
+                # one playlist can't hold them all: split in input order, keeping each line's row for the report
+                store, include = table.store, table.include
+                plan = ShardPlan()
+                for i in range(len(store)):
+                    plan.add_line(store.line_nos[i], store.inputs[i], store.uris[i] if include[i] else None)
+                pv.destroy()
+                scheduler.submit(Job('Create from preview', lambda job: create_shards_with_plan(
+                    job, state['sp'], plan, playlist_name, public, filepath)))
+                return
+            pv.destroy()
+            # run creation in background
+            scheduler.submit(Job('Create from preview', lambda job: create_playlist_with_uris(
+                job, state['sp'], playlist_name, public, filepath, uris)))
+
+        create_btn = tk.Button(btn_frame, text='Create Playlist from Matches', bg='#4CAF50', fg='white',
+                               command=create_from_preview, state='disabled')
+        create_btn.pack(side='left')
+        tk.Button(btn_frame, text='Include All', command=lambda: table.set_all(True)).pack(side='left', padx=6)
+        tk.Button(btn_frame, text='Exclude All', command=lambda: table.set_all(False)).pack(side='left')
+        tk.Label(btn_frame, text='Double-click or Space toggles selected rows').pack(side='left', padx=10)
+
+        def export_csv():
+            path = filedialog.asksaveasfilename(parent=pv, defaultextension='.csv',
+                                                filetypes=[("CSV", "*.csv"), ("All files", "*.*")])
+            if not path:
+                return
+            save_selection()
+            try:
+                PreviewArtifact.load(state['artifact']).export_csv(path)
+                write_log(f'✓ Preview written to {path}')
+            except (OSError, ValueError) as e:
+                write_log(f'Error writing preview: {e}')
+
+        def close_preview():
+            # closing the window also stops a preview that is still searching
+            job.cancel()
+            save_selection()
+            pv.destroy()
+
+        close_btn = tk.Button(btn_frame, text='Close', command=close_preview)
+        close_btn.pack(side='right')
+        export_btn = tk.Button(btn_frame, text='Export CSV', command=export_csv, state='disabled')
+        export_btn.pack(side='right', padx=6)
+        pv.protocol('WM_DELETE_WINDOW', close_preview)
+        apply_theme(dark_theme_var.get(), pv)
+
+        def finish_preview():
+            state['done'] = True
+            preview_btn.configure(state='normal')
+            if pv.winfo_exists():
+                table.flush()
+                update_info()
+                if state['sp'] is not None:
+                    create_btn.configure(state='normal')
+                if state['artifact'] is not None:
+                    export_btn.configure(state='normal')
+
+        def worker_preview(job):
+            # Create Spotify client for preview
+            try:
+                sp = create_spotify_client()
+            except Exception as e:
+                events.log(f"Error during auth for preview: {e}")
+                root.after(0, finish_preview)
+                return
+
+            cache = None
+            catalog = None
+            writer = None
+            try:
+                songs = get_songs_from_inputs(filepath)
+                if not songs:
+                    events.log('No songs found or error reading input!')
+                    return
+                job.total = len(songs)
+                try:
+                    writer = PreviewWriter(input_hash(songs), source, playlist_name)
+                except OSError as e:
+                    events.log(f"Preview will not be saved: {e}")
+
+                cache = open_search_cache(use_cache)
+                catalog = open_catalog(use_catalog)
+                stats = SearchStats()
+                results = search_songs(sp, songs, concurrency=job.concurrency, cache=cache, stats=stats, job=job,
+                                       catalog=catalog)
+                # each line also reaches the log as a SEARCH_FINISHED event
+                # rows are numbered by their line in the file (or pasted text), skipped lines included
+                for line_no, (song_name, context, track, error) in zip(source_line_numbers(songs), results):
+                    table.add(line_no, format_line(song_name, context), track)
+                    if writer is not None:
+                        writer.add(line_no, song_name, context, track, error)
+                report = stats.report()
+                events.log(report)
+                if cache is not None:
+                    events.log(f"Search cache: {cache.hits} hits, {cache.misses} misses")
+                if catalog is not None:
+                    events.log(f"Track catalog: {catalog.hits} hits, {catalog.misses} misses, "
+                               f"{catalog.learned} tracks learned")
+                if writer is not None:
+                    writer.finish()
+                    state['artifact'] = writer.path
+                    if writer.errors:
+                        events.log(f"Preview saved to {writer.path}. {writer.errors} searches failed, so Create "
+                                   f"Playlist will search the input again")
+                    else:
+                        events.log(f"Preview saved to {writer.path}; Create Playlist will reuse it")
+                state['sp'] = sp
+
+            finally:
+                if writer is not None and state['artifact'] is None:
+                    writer.abandon()
+                if cache is not None:
+                    cache.close()
+                if catalog is not None:
+                    catalog.close()
+                root.after(0, finish_preview)
+
+        job = scheduler.submit(Job('Preview', worker_preview))
+
+    preview_btn.configure(command=preview_matches)
+
+    root.mainloop()
@@ -0,0 +1,135 @@
+"""Cancellable background jobs and the scheduler that runs them."""
+import threading
+import time
+from collections import deque
+
+from .config import SEARCH_CONCURRENCY
+from .events import JOB_DONE, events
+from .metrics import metrics
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's thread once the job has been cancelled."""
+
+
+class Job:
+    """A unit of background work with cancellation and progress counters.
+
+    target is called as target(job) on a scheduler thread. Long loops call
+    job.check() to stop at the next line once cancelled, and job.advance()
+    per line done; search_songs does both when given the job.
+    """
+
+    def __init__(self, name, target, total=None):
+        self.name = name
+        self.target = target
+        self.total = total
+        self.concurrency = SEARCH_CONCURRENCY
+        self.state = 'queued'
+        self.lines = 0
+        self.api_calls = 0
+        self.started = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.name)
+
+    def advance(self, lines=1, api_calls=0):
+        with self._lock:
+            self.lines += lines
+            self.api_calls += api_calls
+
+    def skip(self, lines=1):
+        """Drop lines that need no work (e.g. already journaled) from the total."""
+        with self._lock:
+            if self.total is not None:
+                self.total = max(0, self.total - lines)
+
+    def progress(self):
+        """(lines done, total or None, lines per second, seconds left or None, API calls)."""
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        rate = self.lines / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.lines) / rate if self.total is not None and rate > 0 else None
+        return self.lines, self.total, rate, eta, self.api_calls
+
+    def describe(self):
+        done, total, rate, eta, calls = self.progress()
+        text = f"{self.name}: {done}/{total if total is not None else '?'} lines, {rate:.1f} lines/s"
+        if eta is not None:
+            text += f", ETA {int(eta // 60)}:{int(eta % 60):02d}"
+        return text + f", {calls} API calls"
+
+
+class JobScheduler:
+    """Runs jobs first-in first-out, at most max_running at a time.
+
+    A job's search workers are fixed when it starts: concurrency divided by
+    the number of jobs running then, itself included. A job that starts alone
+    gets the whole budget; one joining a running job gets half of it. All of
+    them already share the rate gate, which keeps the request rate in check. Each
+    job's thread is bound to it on the event bus, so what it publishes carries
+    the job, and a JOB_DONE event reports how it ended.
+    """
+
+    def __init__(self, max_running=2, concurrency=SEARCH_CONCURRENCY):
+        self.max_running = max(1, max_running)
+        self.concurrency = concurrency
+        self.queued = deque()
+        self.running = []
+        self._lock = threading.Lock()
+
+    def submit(self, job):
+        with self._lock:
+            self.queued.append(job)
+        self._start_queued()
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self.running) + list(self.queued)
+
+    def cancel_all(self):
+        for job in self.jobs():
+            job.cancel()
+
+    def _start_queued(self):
+        with self._lock:
+            while self.queued and len(self.running) < self.max_running:
+                # cancelled jobs still start so their own cleanup runs; they stop at the first check()
+                job = self.queued.popleft()
+                self.running.append(job)
+                job.concurrency = max(1, self.concurrency // len(self.running))
+                threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        job.state = 'running'
+        job.started = time.monotonic()
+        metrics.inc('jobs_started_total')
+        events.bind_job(job)
+        error = None
+        try:
+            job.target(job)
+            job.state = 'cancelled' if job.cancelled else 'done'
+        except JobCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.state = 'failed'
+            error = e
+        finally:
+            if job.state == 'cancelled':
+                metrics.inc('jobs_cancelled_total')
+            with self._lock:
+                self.running.remove(job)
+            events.emit(JOB_DONE, job, name=job.name, state=job.state, lines=job.lines, api_calls=job.api_calls,
+                        seconds=time.monotonic() - job.started, error=error)
+            events.bind_job(None)
+            self._start_queued()
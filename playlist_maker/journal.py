@@ -0,0 +1,110 @@
+"""Append-only job journals used to resume interrupted runs."""
+import hashlib
+import json
+import os
+
+from .config import JOURNAL_DIR
+
+
+def journal_path_for(source, playlist_name):
+    """Journal file for a (source, playlist name) pair; the same inputs map to the same journal."""
+    if not source.startswith('manual:'):
+        source = os.path.abspath(source)
+    digest = hashlib.sha1(f"{source}\n{playlist_name}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(JOURNAL_DIR, f"{digest}.jsonl")
+
+
+class JobJournal:
+    """Append-only JSONL checkpoint of one playlist job.
+
+    Records the playlist, every resolved line (by input index, with its URI or
+    None when not found) and every batch of URIs committed to the playlist, so
+    an interrupted job can be resumed without searching or adding twice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.playlist_id = None
+        self.playlist_url = None
+        self.done = False
+        self.lines = {}        # input index -> (song_name, context, uri)
+        self.committed = set()
+        self._fh = None
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for raw in f:
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    # a torn last line from a crash; everything before it is intact
+                    continue
+                kind = rec.get('t')
+                if kind == 'job':
+                    self.playlist_id = rec.get('playlist_id')
+                    self.playlist_url = rec.get('url')
+                elif kind == 'line':
+                    self.lines[rec['i']] = (rec['song'], rec['context'], rec.get('uri'))
+                elif kind == 'batch':
+                    self.committed.update(rec['uris'])
+                elif kind == 'done':
+                    self.done = True
+
+    def _append(self, rec):
+        if self._fh is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._fh = open(self.path, 'a', encoding='utf-8')
+        self._fh.write(json.dumps(rec, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._fh.flush()
+
+    def reset(self):
+        """Forget any previous job stored at this path."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.playlist_id = None
+        self.playlist_url = None
+        self.done = False
+        self.lines = {}
+        self.committed = set()
+
+    def start(self, playlist_id, playlist_url, name, source):
+        self.playlist_id = playlist_id
+        self.playlist_url = playlist_url
+        self._append({'t': 'job', 'playlist_id': playlist_id, 'url': playlist_url, 'name': name, 'source': source})
+
+    def resolved_uri(self, index, song_name, context):
+        """Return (True, uri) if this exact line was already resolved, else (False, None)."""
+        rec = self.lines.get(index)
+        if rec is not None and rec[0] == song_name and rec[1] == context:
+            return True, rec[2]
+        return False, None
+
+    def pending_uris(self):
+        """URIs resolved in an earlier session but never committed, in input order."""
+        pending = []
+        seen = set(self.committed)
+        for index in sorted(self.lines):
+            uri = self.lines[index][2]
+            if uri and uri not in seen:
+                seen.add(uri)
+                pending.append(uri)
+        return pending
+
+    def record_line(self, index, song_name, context, uri):
+        self._append({'t': 'line', 'i': index, 'song': song_name, 'context': context, 'uri': uri})
+
+    def record_batch(self, uris):
+        self.committed.update(uris)
+        self._append({'t': 'batch', 'uris': list(uris)})
+
+    def finish(self):
+        self.done = True
+        self._append({'t': 'done'})
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,88 @@
+"""Process-wide counters and latency histograms for the hot paths."""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Process-wide counters and latency histograms for the hot paths.
+
+    Exported at the end of a run as JSON (to_json) or Prometheus text format
+    (to_prometheus). Histogram names end in _seconds; everything else is a counter.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = {'buckets': [0] * len(self.BUCKETS), 'count': 0, 'sum': 0.0}
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    h['buckets'][i] += 1
+                    break
+            h['count'] += 1
+            h['sum'] += seconds
+
+    @contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """Plain-dict copy; histogram buckets are cumulative, keyed by upper bound."""
+        with self._lock:
+            histograms = {}
+            for name, h in self.histograms.items():
+                running, buckets = 0, {}
+                for bound, n in zip(self.BUCKETS, h['buckets']):
+                    running += n
+                    buckets[str(bound)] = running
+                buckets['+Inf'] = h['count']
+                histograms[name] = {'count': h['count'], 'sum': round(h['sum'], 6), 'buckets': buckets}
+            return {'counters': dict(sorted(self.counters.items())), 'histograms': dict(sorted(histograms.items()))}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix='playlist_maker_'):
+        snap = self.snapshot()
+        out = []
+        for name, value in sorted(snap['counters'].items()):
+            out.append(f"# TYPE {prefix}{name} counter")
+            out.append(f"{prefix}{name} {value}")
+        for name, h in sorted(snap['histograms'].items()):
+            out.append(f"# TYPE {prefix}{name} histogram")
+            for bound, n in h['buckets'].items():
+                out.append(f'{prefix}{name}_bucket{{le="{bound}"}} {n}')
+            out.append(f"{prefix}{name}_sum {h['sum']}")
+            out.append(f"{prefix}{name}_count {h['count']}")
+        return '\n'.join(out) + '\n'
+
+    def export(self, path):
+        """Write the metrics to path: Prometheus text for .prom/.txt files, JSON otherwise."""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+metrics = Metrics()
@@ -0,0 +1,184 @@
+"""Song file and manual-entry parsing."""
+import itertools
+import os
+import re
+import unicodedata
+from array import array
+
+from .events import LINE_PARSED, events
+from .metrics import metrics
+from .profiling import phase
+
+
+TRACK_LINK_RE = re.compile(
+    r'^(?:spotify:track:|https?://open\.spotify\.com/(?:intl-[a-z]{2}/)?track/)([A-Za-z0-9]{22})(?:[?#/].*)?$'
+)
+ISRC_RE = re.compile(r'^(?:isrc:?\s*)?([A-Z]{2})-?([A-Z0-9]{3})-?(\d{2})-?(\d{5})$', re.IGNORECASE)
+
+
+def match_direct_line(raw):
+    """Recognize lines that identify a track without a free-text search.
+
+    Track URIs and open.spotify.com links become ('spotify:track:<id>', ''),
+    ISRCs become ('isrc:<code>', ''). Anything else returns None.
+    """
+    m = TRACK_LINK_RE.match(raw)
+    if m:
+        return f"spotify:track:{m.group(1)}", ''
+    m = ISRC_RE.match(raw)
+    if m:
+        return f"isrc:{''.join(m.groups()).upper()}", ''
+    return None
+
+
+# Separators between song and context. A dash with whitespace on both sides
+# wins, so hyphenated titles ("Spider-Man - Danny Elfman") stay whole; only a
+# line without one falls back to its first bare en/em dash, then hyphen.
+_SPACED_SEP_RE = re.compile(r' [-\u2013\u2014] ')
+_DASH_SEP_RE = re.compile(r'[\u2013\u2014]')
+_EDGE_QUOTES = '"\'\u201c\u201d\u2018\u2019'
+
+# canonical_key ignores quotes and the dash style
+_KEY_QUOTES_RE = re.compile(r'[\'"\u2018\u2019\u201c\u201d`]')
+
+
+def normalize_text(text):
+    """NFKC-normalize text and collapse every run of whitespace (NBSP, tabs...) to one space."""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+    return ' '.join(text.split())
+
+
+def canonical_key(song_name, context=''):
+    """Canonical key for a parsed line, so the same song typed differently is searched once.
+
+    Ignores case, quotes, dash style and extra whitespace. Track URIs and ISRCs
+    are their own key.
+    """
+    if song_name.startswith(('spotify:track:', 'isrc:')):
+        return song_name
+    parts = []
+    for text in (song_name, context):
+        if not text.isascii():
+            text = unicodedata.normalize('NFKC', text)
+        text = _KEY_QUOTES_RE.sub('', text.casefold())
+        # every dash becomes " - "; the split/join below collapses the spacing around it
+        text = text.replace('\u2013', '-').replace('\u2014', '-').replace('-', ' - ')
+        parts.append(' '.join(text.split()))
+    return '\x1f'.join(parts)
+
+
+def parse_line(raw, require_context=True):
+    """Parse one input line into (song_name, context), or None to skip it.
+
+    The line is normalized first (normalize_text), then split at the earliest
+    spaced dash, or failing that at the earliest bare dash. Song files need a
+    separator; with require_context=False (manual entries) a line without one
+    is taken as a song name with empty context.
+    """
+    raw = normalize_text(raw)
+    if not raw:
+        return None
+
+    # URIs, links and ISRCs skip the separator rules entirely (and never contain " - ")
+    if ' ' not in raw or raw[:4].lower() == 'isrc':
+        direct = match_direct_line(raw)
+        if direct:
+            return direct
+
+    sep = _SPACED_SEP_RE.search(raw) or _DASH_SEP_RE.search(raw)
+    if sep is not None:
+        start, end = sep.span()
+    else:
+        start = raw.find('-')
+        if start < 0:
+            return None if require_context else (raw, '')
+        end = start + 1
+
+    song_name = raw[:start].strip().strip(_EDGE_QUOTES)
+    context = raw[end:].strip()
+    if song_name and (context or not require_context):
+        return song_name, context
+    return None
+
+
+class SongList(list):
+    """Parsed (song_name, context) pairs, with the 1-based source line of each in line_nos.
+
+    Blank and unparseable lines are skipped, so a song's position in the list
+    and its line in the file differ; reports that point at file lines use
+    line_nos (see source_line_numbers).
+    """
+
+    __slots__ = ('line_nos',)
+
+    def __init__(self):
+        super().__init__()
+        self.line_nos = array('I')
+
+
+def source_line_numbers(songs):
+    """Iterator over the source line of each song: line_nos of a SongList, else 1, 2, 3, ..."""
+    line_nos = getattr(songs, 'line_nos', None)
+    return iter(line_nos) if line_nos is not None else itertools.count(1)
+
+
+def parse_lines(lines, require_context=True, line_nos=None):
+    """Lazily yield (song_name, context) for each usable line of an iterable.
+
+    Each one is also published as a LINE_PARSED event, if anyone subscribed
+    when parsing started. With line_nos (an array or list), the 1-based
+    number of the source line of each yielded song is appended to it.
+    """
+    seen = parsed = 0
+    publish = events.wants(LINE_PARSED)
+    try:
+        for line in lines:
+            seen += 1
+            song = parse_line(line, require_context)
+            if song:
+                parsed += 1
+                if line_nos is not None:
+                    line_nos.append(seen)
+                if publish:
+                    events.emit(LINE_PARSED, line=seen, song=song[0], context=song[1])
+                yield song
+    finally:
+        # counted once per run rather than taking the metrics lock for every line
+        metrics.inc('parse_lines_total', seen)
+        metrics.inc('parse_songs_total', parsed)
+
+
+def parse_text(text):
+    """Parse pasted manual entries into a SongList; lines without a separator are kept as song names."""
+    songs = SongList()
+    songs.extend(parse_lines(text.splitlines(), require_context=False, line_nos=songs.line_nos))
+    return songs
+
+
+def iter_songs_from_file(filename):
+    """Lazily yield (song_name, context) from a text file, one line at a time.
+
+    Same rules as read_songs_from_file; the file is never held in memory.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        yield from parse_lines(f)
+
+
+def read_songs_from_file(filename):
+    """Read songs from a text file into a SongList. Accepts hyphen, en-dash, em-dash as separator."""
+    if not os.path.exists(filename):
+        events.log(f"Error: File '{filename}' not found!")
+        return None
+
+    try:
+        with metrics.time('parse_file_seconds'), phase('parse'):
+            songs = SongList()
+            with open(filename, 'r', encoding='utf-8') as f:
+                songs.extend(parse_lines(f, line_nos=songs.line_nos))
+        events.log(f"✓ Loaded {len(songs)} songs from {filename}\n")
+        return songs
+
+    except Exception as e:
+        events.log(f"Error reading file: {e}")
+        return None
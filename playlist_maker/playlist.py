@@ -0,0 +1,335 @@
+"""Playlist writer: creating, filling and syncing playlists."""
+import re
+from collections import deque
+
+from .cache import open_search_cache
+from .catalog import open_catalog
+from .config import PLAYLIST_BATCH_SIZE, PLAYLIST_MAX_TRACKS, SEARCH_CONCURRENCY
+from .events import BATCH_ADDED, events
+from .governor import call_with_rate_limit
+from .metrics import metrics
+from .profiling import phase
+from .search import SearchStats, format_line, search_songs
+from .session import current_user
+
+
+def add_tracks_in_batches(sp, playlist_id, uris, journal=None):
+    """Add URIs to a playlist in batches of PLAYLIST_BATCH_SIZE. Returns how many were added."""
+    added = 0
+    for i in range(0, len(uris), PLAYLIST_BATCH_SIZE):
+        batch = uris[i:i + PLAYLIST_BATCH_SIZE]
+        try:
+            with metrics.time('playlist_add_seconds'), phase('add'):
+                call_with_rate_limit(sp.playlist_add_items, playlist_id, batch)
+            metrics.inc('playlist_add_batches_total')
+            metrics.inc('playlist_add_items_total', len(batch))
+            added += len(batch)
+            events.emit(BATCH_ADDED, playlist_id=playlist_id, count=len(batch), added=added)
+            if journal is not None:
+                journal.record_batch(batch)
+        except Exception as e:
+            metrics.inc('playlist_add_errors_total')
+            events.log(f"Error adding batch to playlist: {e}")
+    return added
+
+
+def open_playlist_job(sp, playlist_name, public, description, journal=None, resume=False, user=None, source=None):
+    """Create the job's playlist, or reuse the one recorded in the journal when resuming.
+
+    Pass user (a current_user() result) to skip looking it up again, and
+    source (the input identity the journal path was made from: a file path,
+    or 'manual:<digest>' for typed-in lines) to record it in the journal.
+    Returns (playlist_id, playlist_url).
+    """
+    if resume and journal is not None and journal.playlist_id:
+        events.log(f"Resuming playlist: {playlist_name} ({len(journal.lines)} lines already resolved)")
+        events.log(f"Playlist URL: {journal.playlist_url}")
+        return journal.playlist_id, journal.playlist_url
+    if resume:
+        events.log("No previous job to resume; starting a new playlist.")
+
+    if user is None:
+        user = current_user(sp)
+        events.log(f"Logged in as: {user.get('display_name')}")
+
+    playlist = call_with_rate_limit(
+        sp.user_playlist_create,
+        user=user['id'],
+        name=playlist_name,
+        public=public,
+        description=description
+    )
+    url = playlist['external_urls']['spotify']
+    events.log(f"Created playlist: {playlist_name}")
+    events.log(f"Playlist URL: {url}")
+
+    if journal is not None:
+        journal.reset()
+        journal.start(playlist['id'], url, playlist_name, source)
+    return playlist['id'], url
+
+
+def search_and_add_songs(sp, playlist_id, songs, concurrency=SEARCH_CONCURRENCY, cache=None, stream=False, journal=None, job=None,
+                         catalog=None):
+    """Search for songs and add them to the playlist.
+
+    Tracks are added as soon as a full batch of new URIs is ready, so the
+    playlist fills while searching continues. URIs are deduplicated across the
+    whole run. With stream=True, not-found lines are only reported as they
+    happen instead of being collected for the summary, keeping memory flat.
+    With a journal, lines and batches it already holds are skipped and every
+    new result is checkpointed. Cancelling the job stops before the next line;
+    tracks found but not yet added stay in the journal for --resume.
+    """
+    seen = set()
+    batch = []
+    added = 0
+    not_found = []
+    not_found_count = 0
+
+    if journal is not None:
+        seen.update(journal.committed)
+        batch = journal.pending_uris()
+        seen.update(batch)
+        if batch:
+            events.log(f"Re-adding {len(batch)} tracks resolved before the interruption")
+
+    # Input indices of the lines handed to search_songs; results come back in the same order
+    indices = deque()
+
+    def remaining():
+        for index, (song_name, context) in enumerate(songs):
+            if journal is not None and journal.resolved_uri(index, song_name, context)[0]:
+                if job is not None:
+                    job.skip()
+                continue
+            indices.append(index)
+            yield song_name, context
+
+    stats = SearchStats()
+    for song_name, context, track, error in search_songs(sp, remaining(), concurrency, cache=cache, stats=stats, job=job,
+                                                         catalog=catalog):
+        # search_songs has already published each result as a SEARCH_FINISHED event
+        index = indices.popleft()
+        if track:
+            if journal is not None:
+                journal.record_line(index, song_name, context, track.uri)
+            if track.uri not in seen:
+                seen.add(track.uri)
+                if len(seen) == PLAYLIST_MAX_TRACKS + 1:
+                    events.log(f"Warning: more than {PLAYLIST_MAX_TRACKS} tracks; Spotify will reject the rest. "
+                               f"Use --shard to split them over several playlists.")
+                batch.append(track.uri)
+                if len(batch) >= PLAYLIST_BATCH_SIZE:
+                    added += add_tracks_in_batches(sp, playlist_id, batch, journal=journal)
+                    batch = []
+            continue
+        if error is None and journal is not None:
+            journal.record_line(index, song_name, context, None)
+        not_found_count += 1
+        if not stream:
+            not_found.append(format_line(song_name, context))
+
+    if batch:
+        added += add_tracks_in_batches(sp, playlist_id, batch, journal=journal)
+
+    if journal is not None:
+        journal.finish()
+
+    if added:
+        events.log(f"\n✓ Successfully added {added} songs to the playlist!")
+
+    if not_found:
+        events.log(f"\n✗ Could not find {len(not_found)} songs:")
+        for song in not_found:
+            events.log(f"  - {song}")
+
+    events.log(f"\n{stats.report()}")
+    if cache is not None:
+        events.log(f"Search cache: {cache.hits} hits, {cache.misses} misses")
+    if catalog is not None:
+        events.log(f"Track catalog: {catalog.hits} hits, {catalog.misses} misses, {catalog.learned} tracks learned")
+
+    return added, not_found_count
+
+def add_preview_matches(sp, playlist_id, artifact, journal=None, job=None):
+    """Fill a playlist from a saved preview (PreviewArtifact) without searching again.
+
+    Adds the preview's included matches in input order; with a journal,
+    batches it already holds are skipped. Lines whose search failed in the
+    preview are listed and count as not found. Returns (added, not_found).
+    """
+    uris = artifact.uris()
+    not_found = artifact.not_found()
+    failed = artifact.failed()
+    events.log(f"Using saved preview {artifact.path}: {len(uris)} tracks, {len(not_found)} not found, no searches needed")
+    if job is not None:
+        job.total = len(artifact.rows)
+        job.check()
+    if journal is not None:
+        uris = [uri for uri in uris if uri not in journal.committed]
+    added = add_tracks_in_batches(sp, playlist_id, uris, journal=journal)
+    if job is not None:
+        job.advance(len(artifact.rows))
+    if journal is not None:
+        journal.finish()
+
+    if added:
+        events.log(f"\n✓ Successfully added {added} songs to the playlist!")
+    if not_found:
+        events.log(f"\n✗ Could not find {len(not_found)} songs:")
+        for song in not_found:
+            events.log(f"  - {song}")
+    if failed:
+        events.log(f"\n✗ {len(failed)} songs failed to search in the preview and were not added:")
+        for song in failed:
+            events.log(f"  - {song}")
+    return added, len(not_found) + len(failed)
+
+
+def resolve_uris(sp, songs, concurrency=SEARCH_CONCURRENCY, cache=None, job=None, catalog=None):
+    """Search for songs without touching any playlist.
+
+    Returns (unique URIs in input order, list of "song - context" lines not found).
+    """
+    seen = set()
+    uris = []
+    not_found = []
+    stats = SearchStats()
+    for song_name, context, track, error in search_songs(sp, songs, concurrency, cache=cache, stats=stats, job=job,
+                                                         catalog=catalog):
+        if track:
+            if track.uri not in seen:
+                seen.add(track.uri)
+                uris.append(track.uri)
+        else:
+            not_found.append(format_line(song_name, context))
+    events.log(f"\n{stats.report()}")
+    return uris, not_found
+
+
+PLAYLIST_ID_RE = re.compile(r'^(?:spotify:playlist:|https?://open\.spotify\.com/(?:[\w-]+/)?playlist/)?([A-Za-z0-9]{22})(?:[?#].*)?$')
+
+
+def find_playlist(sp, target):
+    """Resolve a playlist ID, URI, URL or name (one of the user's own playlists).
+
+    Returns (playlist_id, playlist_url) or None if no playlist matches.
+    """
+    target = target.strip()
+    m = PLAYLIST_ID_RE.match(target)
+    if m:
+        playlist_id = m.group(1)
+        return playlist_id, f"https://open.spotify.com/playlist/{playlist_id}"
+
+    user = current_user(sp)
+    wanted = target.casefold()
+    page = call_with_rate_limit(sp.current_user_playlists, limit=50)
+    while page:
+        for pl in page.get('items') or []:
+            if pl and pl.get('name', '').casefold() == wanted and pl.get('owner', {}).get('id') == user['id']:
+                return pl['id'], pl['external_urls']['spotify']
+        page = call_with_rate_limit(sp.next, page) if page.get('next') else None
+    return None
+
+
+def fetch_playlist_uris(sp, playlist_id):
+    """Return the track URIs currently in a playlist, in playlist order (100 per request)."""
+    uris = []
+    page = call_with_rate_limit(sp.playlist_items, playlist_id, fields='items(track(uri)),next', limit=100,
+                                additional_types=('track',))
+    while page:
+        for item in page.get('items') or []:
+            track = item.get('track') if item else None
+            if track and track.get('uri'):
+                uris.append(track['uri'])
+        page = call_with_rate_limit(sp.next, page) if page.get('next') else None
+    return uris
+
+
+def sync_playlist(sp, playlist_id, uris, reorder=False):
+    """Make an existing playlist hold exactly `uris` using as few write calls as possible.
+
+    Only missing tracks are added and only unwanted tracks are removed, each in
+    batches of PLAYLIST_BATCH_SIZE. Local files are never removed. With
+    reorder=True the playlist is rewritten in input order if it differs.
+    Returns (added, removed).
+    """
+    current = fetch_playlist_uris(sp, playlist_id)
+    events.log(f"Playlist currently has {len(current)} tracks")
+    wanted = set(uris)
+    present = set(current)
+
+    to_remove = []
+    removing = set()
+    for uri in current:
+        if uri not in wanted and not uri.startswith('spotify:local:') and uri not in removing:
+            removing.add(uri)
+            to_remove.append(uri)
+    to_add = [uri for uri in uris if uri not in present]
+
+    removed = 0
+    for i in range(0, len(to_remove), PLAYLIST_BATCH_SIZE):
+        batch = to_remove[i:i + PLAYLIST_BATCH_SIZE]
+        try:
+            call_with_rate_limit(sp.playlist_remove_all_occurrences_of_items, playlist_id, batch)
+            removed += len(batch)
+        except Exception as e:
+            events.log(f"Error removing batch from playlist: {e}")
+
+    added = add_tracks_in_batches(sp, playlist_id, to_add)
+
+    if reorder:
+        kept = [uri for uri in current if uri in wanted] + to_add
+        if kept != uris:
+            events.log("Reordering playlist to match the input order...")
+            try:
+                call_with_rate_limit(sp.playlist_replace_items, playlist_id, uris[:PLAYLIST_BATCH_SIZE])
+                add_tracks_in_batches(sp, playlist_id, uris[PLAYLIST_BATCH_SIZE:])
+            except Exception as e:
+                events.log(f"Error reordering playlist: {e}")
+
+    events.log(f"✓ Sync complete: {added} added, {removed} removed, {len(uris) - added} already present")
+    return added, removed
+
+
+def sync_existing_playlist(sp, target, songs, concurrency=SEARCH_CONCURRENCY, use_cache=True, clear_cache=False, reorder=False, job=None,
+                           use_catalog=True, artifact=None):
+    """Resolve songs and sync them into the existing playlist named by target.
+
+    With a saved preview (artifact), its matches are used and songs is ignored.
+    """
+    found = find_playlist(sp, target)
+    if not found:
+        events.log(f"Error: no playlist matching '{target}' found in your library!")
+        return None
+    playlist_id, playlist_url = found
+    events.log(f"Updating playlist: {target}")
+    events.log(f"Playlist URL: {playlist_url}\n")
+
+    if artifact is not None:
+        events.log(f"Using saved preview {artifact.path}, no searches needed")
+        uris, not_found = artifact.uris(), artifact.not_found() + artifact.failed()
+    else:
+        cache = open_search_cache(enabled=use_cache, clear=clear_cache)
+        catalog = open_catalog(use_catalog)
+        try:
+            uris, not_found = resolve_uris(sp, songs, concurrency=concurrency, cache=cache, job=job, catalog=catalog)
+        finally:
+            if cache is not None:
+                cache.close()
+            if catalog is not None:
+                catalog.close()
+
+    added, removed = sync_playlist(sp, playlist_id, uris, reorder=reorder)
+    if not_found:
+        events.log(f"\n✗ Could not find {len(not_found)} songs:")
+        for song in not_found:
+            events.log(f"  - {song}")
+
+    events.log(f"\n{'='*60}")
+    events.log(f"Summary: {added} songs added, {removed} removed, {len(not_found)} not found")
+    events.log(f"{'='*60}")
+    events.log(f"\nYour playlist is up to date! Open it here:")
+    events.log(playlist_url)
+    return added, removed
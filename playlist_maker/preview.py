@@ -0,0 +1,220 @@
+"""Saved preview results, so Create (GUI or CLI) can skip searching a previewed input again."""
+import csv
+import hashlib
+import json
+import os
+import time
+
+from .config import PREVIEW_DIR, PREVIEW_MAX_AGE
+from .search import format_line
+
+# Bump when the record layout changes; artifacts of another version are ignored.
+# 2: lines whose search failed carry an error instead of passing for not found.
+PREVIEW_VERSION = 2
+
+CSV_COLUMNS = ('line', 'input', 'song', 'context', 'track', 'artist', 'score', 'uri', 'include', 'error')
+
+
+def input_hash(songs):
+    """Digest of a parsed song list; the same lines in the same order give the same hash."""
+    h = hashlib.sha256(f"v{PREVIEW_VERSION}\n".encode('utf-8'))
+    for song_name, context in songs:
+        h.update(f"{song_name}\x1f{context}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def preview_path_for(digest):
+    """Artifact file for an input hash."""
+    return os.path.join(PREVIEW_DIR, f"{digest[:16]}.jsonl")
+
+
+class PreviewWriter:
+    """Writes a preview artifact line by line as results arrive.
+
+    Records go to a .part file that only replaces the artifact once finish()
+    is called, so a cancelled preview never shadows a complete older one.
+    Layout: a header record, one record per input line, then an end record.
+    """
+
+    def __init__(self, digest, source, playlist_name, path=None):
+        self.path = path or preview_path_for(digest)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._part = self.path + '.part'
+        self._fh = open(self._part, 'w', encoding='utf-8')
+        self.found = 0
+        self.errors = 0
+        self.lines = 0
+        self._write({'t': 'preview', 'version': PREVIEW_VERSION, 'input_hash': digest,
+                     'source': source, 'playlist': playlist_name, 'created': time.time()})
+
+    def _write(self, rec):
+        self._fh.write(json.dumps(rec, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def add(self, line_no, song_name, context, match=None, error=None):
+        """Record one line: its match, nothing (not found) or the error its search ended with."""
+        rec = {'t': 'line', 'i': line_no, 'song': song_name, 'context': context}
+        if match is not None:
+            rec.update(name=match.name, artist=match.artist, uri=match.uri, score=match.score)
+            self.found += 1
+        elif error is not None:
+            rec['error'] = str(error) or type(error).__name__
+            self.errors += 1
+        self.lines += 1
+        self._write(rec)
+
+    def finish(self):
+        """Mark the preview complete and move it into place."""
+        self._write({'t': 'end', 'lines': self.lines, 'found': self.found, 'errors': self.errors})
+        self._fh.close()
+        os.replace(self._part, self.path)
+
+    def abandon(self):
+        """Drop an incomplete preview (cancelled or failed)."""
+        self._fh.close()
+        try:
+            os.remove(self._part)
+        except OSError:
+            pass
+
+
+def save_exclusions(path, line_nos):
+    """Record which matched lines were excluded in the preview window (the last record wins)."""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'t': 'exclude', 'lines': sorted(line_nos)}, separators=(',', ':')) + '\n')
+
+
+class PreviewArtifact:
+    """A loaded preview: header fields plus one row per input line.
+
+    rows holds (line_no, song_name, context, track name, artist, uri, score);
+    not-found lines have an empty URI and a score of None. Lines whose search
+    failed (network error, 5xx) look the same but are also listed in errors,
+    line number -> error text.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+        self.input_hash = None
+        self.source = None
+        self.playlist = None
+        self.created = 0.0
+        self.complete = False
+        self.rows = []
+        self.excluded = set()
+        self.errors = {}
+
+    @classmethod
+    def load(cls, path):
+        """Read a JSONL artifact or a CSV export of one."""
+        if os.path.splitext(path)[1].lower() == '.csv':
+            return cls._load_csv(path)
+        art = cls(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            for raw in f:
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    continue
+                kind = rec.get('t')
+                if kind == 'line':
+                    art.rows.append((rec['i'], rec['song'], rec['context'], rec.get('name', ''),
+                                     rec.get('artist', ''), rec.get('uri', ''), rec.get('score')))
+                    if 'error' in rec:
+                        art.errors[rec['i']] = rec['error']
+                elif kind == 'preview':
+                    art.version = rec.get('version')
+                    art.input_hash = rec.get('input_hash')
+                    art.source = rec.get('source')
+                    art.playlist = rec.get('playlist')
+                    art.created = rec.get('created', 0.0)
+                elif kind == 'exclude':
+                    art.excluded = set(rec['lines'])
+                elif kind == 'end':
+                    art.complete = True
+        return art
+
+    @classmethod
+    def _load_csv(cls, path):
+        art = cls(path)
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                line_no = int(row['line'])
+                score = row.get('score')
+                art.rows.append((line_no, row.get('song', ''), row.get('context', ''), row.get('track', ''),
+                                 row.get('artist', ''), row.get('uri', ''), float(score) if score else None))
+                if row.get('include', '1').strip().lower() in ('0', 'false', 'no'):
+                    art.excluded.add(line_no)
+                if row.get('error'):
+                    art.errors[line_no] = row['error']
+        art.version = PREVIEW_VERSION
+        art.complete = True
+        art.created = os.path.getmtime(path)
+        return art
+
+    def is_fresh_for(self, digest, max_age=PREVIEW_MAX_AGE):
+        """True if this is a complete artifact of the current version for that input, not older than max_age.
+
+        A preview with failed searches is never fresh: reusing it would leave
+        those lines out, so the input is searched again (mostly from the cache).
+        """
+        return (self.complete and not self.errors and self.version == PREVIEW_VERSION and self.input_hash == digest
+                and time.time() - self.created <= max_age)
+
+    def uris(self):
+        """URIs of the included matches, deduplicated, in input order."""
+        seen = set()
+        uris = []
+        for line_no, _, _, _, _, uri, _ in self.rows:
+            if uri and line_no not in self.excluded and uri not in seen:
+                seen.add(uri)
+                uris.append(uri)
+        return uris
+
+    def not_found(self):
+        """"song - context" for every line the preview searched and could not match."""
+        return [format_line(song, ctx) for line_no, song, ctx, _, _, uri, _ in self.rows
+                if not uri and line_no not in self.errors]
+
+    def failed(self):
+        """"song - context: error" for every line whose search failed in the preview."""
+        return [f"{format_line(song, ctx)}: {self.errors[line_no]}" for line_no, song, ctx, _, _, _, _ in self.rows
+                if line_no in self.errors]
+
+    def export_csv(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for line_no, song, ctx, name, artist, uri, score in self.rows:
+                writer.writerow((line_no, format_line(song, ctx), song, ctx, name, artist,
+                                 '' if score is None else score, uri, 0 if line_no in self.excluded else 1,
+                                 self.errors.get(line_no, '')))
+
+
+def find_fresh_preview(songs):
+    """The saved preview of exactly this song list if it is complete and recent enough, else None."""
+    digest = input_hash(songs)
+    path = preview_path_for(digest)
+    if not os.path.exists(path):
+        return None
+    try:
+        art = PreviewArtifact.load(path)
+    except (OSError, KeyError, ValueError):
+        return None
+    return art if art.is_fresh_for(digest) else None
+
+
+def is_preview_file(path):
+    """True if path is a preview artifact (JSONL with a preview header, or a CSV export of one)."""
+    try:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            first = f.readline()
+    except (OSError, UnicodeDecodeError):
+        return False
+    if os.path.splitext(path)[1].lower() == '.csv':
+        # exports made before the error column was added are still accepted
+        return first.strip().split(',')[:len(CSV_COLUMNS) - 1] == list(CSV_COLUMNS[:-1])
+    try:
+        return json.loads(first).get('t') == 'preview'
+    except (ValueError, AttributeError):
+        return False
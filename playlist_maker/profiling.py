@@ -0,0 +1,280 @@
+"""Profiling mode: sampled stacks, per-phase timings and allocation reports for one run."""
+import contextlib
+import heapq
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from .config import LOG_DIR, PROFILE_INTERVAL, PROFILE_MAX_STEPS, PROFILE_SNAPSHOT_INTERVAL
+
+_active = None
+_no_phase = contextlib.nullcontext()
+
+
+class _Phase:
+    """Context manager marking one phase on the current thread of the active Profiler."""
+
+    __slots__ = ('profiler', 'name', 'stack', 'start', 'cpu', 'mem')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.stack = self.profiler._enter(self.name)
+        self.start = time.perf_counter()
+        self.cpu = time.thread_time()
+        self.mem = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._exit(self, time.perf_counter() - self.start, time.thread_time() - self.cpu,
+                            tracemalloc.get_traced_memory()[0] - self.mem)
+        return False
+
+
+class Profiler:
+    """Samples every thread's stack and snapshots allocations at phase boundaries.
+
+    A sampler thread reads all thread stacks every `interval` seconds and
+    counts them as collapsed stacks ("root;caller;callee count", the input
+    format of flamegraph.pl and speedscope), rooted at the phases the thread
+    was in, so network waits show up too. Sampling rather than cProfile,
+    because cProfile only sees the thread that enabled it and the searches run
+    on worker threads.
+
+    The hot paths mark phases with phase(): parse, search (each lookup, on its
+    worker), add and the GUI's preview and log rendering. Each phase gets its
+    entries and their summed wall time, CPU time of the thread they ran on and
+    net traced memory. Threads outside any phase (idle pool workers, the Tk
+    loop) are listed by name, but only samples inside a phase make up the top
+    functions. When a thread enters or leaves its outermost phase, a
+    tracemalloc snapshot is requested (for each phase at most once per
+    snapshot_interval seconds, as the GUI renders 20 times a second). A
+    background thread takes it and compares its per-line totals with those of
+    the previous snapshot. It keeps only the top lines of that diff, for at
+    most max_steps steps, so memory use does not grow with the run. Grouping a
+    large heap takes seconds, so boundaries that pass while one is processed
+    fold into the next step. The report lists what each step allocated, plus
+    the top allocation sites at the end.
+    """
+
+    def __init__(self, out_dir=None, interval=PROFILE_INTERVAL, snapshot_interval=PROFILE_SNAPSHOT_INTERVAL,
+                 top=25, max_steps=PROFILE_MAX_STEPS):
+        self.out_dir = out_dir or os.path.join(LOG_DIR, time.strftime('profile-%Y%m%d-%H%M%S'))
+        self.interval = interval
+        self.snapshot_interval = snapshot_interval
+        self.top = top
+        self.max_steps = max_steps
+        self.stacks = Counter()
+        self.phases = {}            # name -> [entries, wall seconds, cpu seconds, memory delta]
+        self.steps = []             # (label before, label after, top diff lines)
+        self.skipped_steps = 0
+        self.final_sites = []       # top allocation sites of the last snapshot, as report lines
+        self._previous = None       # (label, {traceback: (size, count)}) of the last snapshot
+        self._thread_phases = {}    # thread ident -> list of phase names, innermost last
+        self._labels = {}           # code object -> frame label
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._requested = None      # label of the boundary waiting for the snapshot thread
+        self._stop = threading.Event()
+        self._sampler = None
+        self._snapshotter = None
+        self._last_snapshot = {}    # phase name -> time of its last boundary snapshot
+        self._started = None
+        self._owns_tracing = False
+
+    def start(self):
+        global _active
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._started = time.perf_counter()
+        self._record('start')
+        self._sampler = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self._sampler.start()
+        self._snapshotter = threading.Thread(target=self._snapshot_loop, name='profiler snapshots', daemon=True)
+        self._snapshotter.start()
+        _active = self
+        return self
+
+    def stop(self):
+        """Stop sampling and write the reports. Returns the directory they are in."""
+        global _active
+        _active = None
+        self._stop.set()
+        with self._wake:
+            self._wake.notify()
+        self._sampler.join()
+        self._snapshotter.join()
+        self._record('end', final=True)
+        if self._owns_tracing:
+            tracemalloc.stop()
+        self.write_reports()
+        return self.out_dir
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def _enter(self, name):
+        stack = self._thread_phases.setdefault(threading.get_ident(), [])
+        if not stack:
+            self._request(f'{name} start', name)
+        stack.append(name)
+        return stack
+
+    def _exit(self, ph, wall, cpu, mem):
+        stack = ph.stack
+        if stack and stack[-1] == ph.name:
+            stack.pop()
+        elif ph.name in stack:
+            # phases normally close in order; a generator closed late may not
+            stack.remove(ph.name)
+        with self._lock:
+            totals = self.phases.setdefault(ph.name, [0, 0.0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cpu
+            totals[3] += mem
+        if not stack:
+            self._request(f'{ph.name} end', ph.name)
+
+    def _request(self, label, phase_name):
+        """Ask the snapshot thread for a snapshot at a phase boundary, at most one per phase per snapshot_interval.
+
+        The calling thread never waits for it. A request made while the
+        previous snapshot is still being processed replaces any request
+        already waiting, so the next step simply covers both boundaries.
+        """
+        now = time.perf_counter()
+        with self._wake:
+            if len(self.steps) >= self.max_steps:
+                self.skipped_steps += 1
+                return
+            if now - self._last_snapshot.get(phase_name, -self.snapshot_interval) < self.snapshot_interval:
+                return
+            self._last_snapshot[phase_name] = now
+            self._requested = label
+            self._wake.notify()
+
+    def _snapshot_loop(self):
+        while True:
+            with self._wake:
+                while self._requested is None and not self._stop.is_set():
+                    self._wake.wait()
+                if self._stop.is_set():
+                    return
+                label, self._requested = self._requested, None
+            self._record(label)
+
+    def _record(self, label, final=False):
+        """Take an allocation snapshot and keep the top lines of its diff with the previous one.
+
+        Only the per-line totals of the snapshot are kept (a few thousand
+        entries) and only until the next one; the snapshot itself is dropped.
+        """
+        stats = [stat for stat in tracemalloc.take_snapshot().statistics('lineno') if self._reported(stat.traceback)]
+        sites = {stat.traceback: (stat.size, stat.count) for stat in stats}
+        previous, self._previous = self._previous, (label, sites)
+        if previous is not None and (final or len(self.steps) < self.max_steps):
+            old = previous[1]
+            diffs = [(size - old.get(tb, (0, 0))[0], count - old.get(tb, (0, 0))[1], tb)
+                     for tb, (size, count) in sites.items()]
+            diffs += [(-size, -count, tb) for tb, (size, count) in old.items() if tb not in sites]
+            lines = [f"  {size / 1024:>+10.1f} KB {count:>+8} blocks  {tb}"
+                     for size, count, tb in heapq.nlargest(10, diffs, key=lambda d: abs(d[0])) if size]
+            with self._lock:
+                self.steps.append((previous[0], label, lines))
+        if final:
+            self.final_sites = [f"  {stat.size / 1024:>10.1f} KB {stat.count:>8} blocks  {stat.traceback}"
+                                for stat in stats[:self.top]]
+            self._previous = None
+
+    @staticmethod
+    def _reported(traceback):
+        """False for allocations made by tracemalloc or the profiler itself."""
+        filename = traceback[0].filename
+        return filename != tracemalloc.__file__ and filename != __file__
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                phases = self._thread_phases.get(ident)
+                if phases:
+                    root = '[phase ' + '/'.join(phases) + ']'
+                else:
+                    if ident not in names:
+                        names.update((t.ident, f"[{t.name}]") for t in threading.enumerate())
+                    root = names.get(ident, f"[{ident}]")
+                frames.append(root)
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def write_reports(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(os.path.join(self.out_dir, 'stacks.txt'), 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(self.out_dir, 'phases.txt'), 'w', encoding='utf-8') as f:
+            f.write(self.phase_report())
+        with open(os.path.join(self.out_dir, 'allocations.txt'), 'w', encoding='utf-8') as f:
+            f.write(self.allocation_report())
+
+    def phase_report(self):
+        elapsed = time.perf_counter() - self._started
+        total = sum(self.stacks.values()) or 1
+        per_root = Counter()
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            root = stack.partition(';')[0]
+            per_root[root] += count
+            if root.startswith('[phase '):
+                leaves[stack.rsplit(';', 1)[-1]] += count
+        in_phases = sum(leaves.values()) or 1
+        out = [f"Run: {elapsed:.2f}s wall, {sum(self.stacks.values())} thread samples every {self.interval * 1000:g} ms",
+               'Wall and CPU seconds are summed over entries, so a phase running on several threads can exceed the run.',
+               '', f"{'phase':<20} {'entries':>8} {'wall s':>9} {'cpu s':>9} {'net KB':>10}"]
+        for name, (entries, wall, cpu, mem) in sorted(self.phases.items(), key=lambda kv: -kv[1][1]):
+            out.append(f"{name:<20} {entries:>8} {wall:>9.3f} {cpu:>9.3f} {mem / 1024:>10.1f}")
+        out += ['', 'Samples per phase (or thread, outside any phase):']
+        for root, count in per_root.most_common():
+            out.append(f"{count:>8} {100 * count / total:>5.1f}%  {root}")
+        out += ['', f'Top {self.top} functions by own samples inside phases (where threads were when sampled):']
+        for leaf, count in leaves.most_common(self.top):
+            out.append(f"{count:>8} {100 * count / in_phases:>5.1f}%  {leaf}")
+        return '\n'.join(out) + '\n'
+
+    def allocation_report(self):
+        out = []
+        if self.final_sites:
+            out.append(f"Top {self.top} allocation sites still held at the end:")
+            out += self.final_sites
+        for before, after, lines in self.steps:
+            if lines:
+                out += ['', f"{before} -> {after}:"] + lines
+        if self.skipped_steps:
+            out += ['', f"{self.skipped_steps} later phase boundaries were not snapshotted "
+                        f"(limit of {self.max_steps} steps); the last step covers them."]
+        return '\n'.join(out) + '\n'
+
+
+def phase(name):
+    """Mark a phase of the run for the active Profiler; does nothing when none is running."""
+    profiler = _active
+    return _no_phase if profiler is None else profiler.phase(name)
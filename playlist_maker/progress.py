@@ -0,0 +1,60 @@
+"""Text rendering of progress events, for the CLI printer and the GUI log."""
+import sys
+import threading
+
+from .events import JOB_DONE, LOG, RETRY, SEARCH_FINISHED, events
+from .search import describe_track, format_line
+
+
+def describe_event(event, detail=False):
+    """Log text for an event, or None for kinds that are not logged line by line.
+
+    With detail, found tracks also show their score and URI (the GUI log does).
+    """
+    kind = event.kind
+    if kind == LOG:
+        return event.text
+    if kind == SEARCH_FINISHED:
+        text = f"Searching for: {format_line(event.song, event.context)}\n"
+        if event.error is not None:
+            return text + f"Error searching for {event.song}: {event.error}"
+        if event.track is None:
+            return text + f"✗ Not found: {event.song}"
+        track = event.track
+        if detail:
+            return text + f"✓ Found: {describe_track(track)} (score {track.score:.2f}, URI: {track.uri})"
+        return text + f"✓ Found: {describe_track(track)}"
+    if kind == RETRY:
+        if event.reason == 'rate_limited':
+            return f"Rate limited. Sleeping for {event.delay} seconds..."
+        return (f"Search error (attempt {event.attempt}/{event.retries}): {event.error}. "
+                f"Retrying in {event.delay:.1f}s...")
+    if kind == JOB_DONE:
+        if event.state == 'cancelled':
+            return f"✗ {event.name} cancelled"
+        if event.state == 'failed':
+            return f"Error in {event.name}: {event.error}"
+        return f"✓ {event.name} finished in {event.seconds:.1f}s"
+    return None
+
+
+class ConsolePrinter:
+    """The CLI's subscriber: writes each event's text to stdout as one whole line.
+
+    quiet leaves out the per-line search results, the bulk of the output on a
+    big file, and keeps the log messages, retries and summaries.
+    """
+
+    def __init__(self, quiet=False):
+        self.kinds = (LOG, RETRY, JOB_DONE) if quiet else (LOG, SEARCH_FINISHED, RETRY, JOB_DONE)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        text = describe_event(event)
+        if text is not None:
+            with self._lock:
+                # looked up per call so redirect_stdout keeps working
+                sys.stdout.write(text + '\n')
+
+    def subscribe(self, bus=events):
+        return bus.subscribe(self, self.kinds)
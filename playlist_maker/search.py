@@ -0,0 +1,406 @@
+"""Search engine: rate-limited API calls, the query planner and match scoring."""
+import difflib
+import random
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import slim_results
+from .config import MATCH_MIN_SCORE, MATCH_THRESHOLD, RATE_LIMIT_RETRIES, SEARCH_CONCURRENCY, SEARCH_RECENT_KEYS
+from .events import RETRY, SEARCH_FINISHED, SEARCH_STARTED, events
+from .governor import get_rate_gate
+from .jobs import JobCancelled
+from .metrics import metrics
+from .profiling import phase
+from .parser import canonical_key
+
+
+class SearchStats:
+    """Thread-safe counters for one run: lines resolved, API search calls made, catalog hits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lines = 0
+        self.resolved = 0
+        self.api_calls = 0
+        self.coalesced = 0
+        self.calls_saved = 0
+        self.local_hits = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, n in counts.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def report(self):
+        per_line = self.api_calls / self.resolved if self.resolved else 0.0
+        report = (f"Search stats: {self.resolved}/{self.lines} lines resolved, "
+                  f"{self.api_calls} API calls ({per_line:.2f} per resolved line)")
+        if self.coalesced:
+            report += f", {self.coalesced} duplicate lines coalesced ({self.calls_saved} calls saved)"
+        if self.local_hits:
+            report += f", {self.local_hits} resolved from the local catalog"
+        return report
+
+
+class TrackMatch:
+    """The matched track for one line, reduced to the fields the app uses."""
+
+    __slots__ = ('name', 'artist', 'uri', 'score')
+
+    def __init__(self, name, artist, uri, score):
+        self.name = name
+        self.artist = artist
+        self.uri = uri
+        self.score = score
+
+    @classmethod
+    def from_track(cls, track, score):
+        """Reduce a search result item; the caller should drop the item afterwards."""
+        return cls(track.get('name') or '', sys.intern(primary_artist(track)), track['uri'], round(score, 3))
+
+
+class ResultStore:
+    """Per-line search results kept as columns instead of one object per line.
+
+    Holds the line number, input text, track name, primary artist, URI and
+    score of every line; not-found lines have an empty URI and a score of -1.
+    Scores and line numbers sit in typed arrays and repeated artist names are
+    interned, so 100k lines cost a few MB.
+    """
+
+    def __init__(self):
+        self.line_nos = array('L')
+        self.scores = array('f')
+        self.inputs = []
+        self.names = []
+        self.artists = []
+        self.uris = []
+
+    def __len__(self):
+        return len(self.uris)
+
+    def append(self, line_no, text, match=None):
+        self.line_nos.append(line_no)
+        self.inputs.append(text)
+        if match is None:
+            self.scores.append(-1.0)
+            self.names.append('')
+            self.artists.append('')
+            self.uris.append('')
+        else:
+            self.scores.append(match.score)
+            self.names.append(match.name)
+            self.artists.append(match.artist)
+            self.uris.append(match.uri)
+
+    def row(self, i):
+        """(line number, input, track, artist, score or None, URI) for row i."""
+        score = self.scores[i]
+        return (self.line_nos[i], self.inputs[i], self.names[i], self.artists[i],
+                None if score < 0 else score, self.uris[i])
+
+    def found_count(self):
+        return sum(1 for uri in self.uris if uri)
+
+
+def safe_search(sp, query, type='track', limit=5, retries=3, cache=None, stats=None):
+    """Search wrapper with retry/backoff and basic 429 handling.
+
+    With a cache, hits skip the API entirely and fresh results are stored slimmed.
+    Each request actually sent to Spotify is counted on stats, if given, and
+    draws from the shared rate budget (see governor.py). Every wait before a
+    retry is published as a RETRY event.
+    """
+    from spotipy.exceptions import SpotifyException  # spotipy is loaded by now: sp is a client
+
+    if cache is not None:
+        cached = cache.get(query)
+        if cached is not None:
+            metrics.inc('search_cache_hits_total')
+            return cached
+        metrics.inc('search_cache_misses_total')
+    gate = get_rate_gate()
+    backoff = 1.0
+    attempt = 1
+    rate_limited = 0
+    # 429s have their own budget so a busy period does not use up the error retries
+    while attempt <= retries:
+        gate.wait()
+        if attempt > 1 or rate_limited:
+            metrics.inc('search_retries_total')
+        try:
+            if stats is not None:
+                stats.add(api_calls=1)
+            metrics.inc('search_attempts_total')
+            with metrics.time('search_request_seconds'):
+                results = sp.search(q=query, type=type, limit=limit)
+            if cache is not None:
+                results = slim_results(results)
+                cache.put(query, results)
+            return results
+        except SpotifyException as e:
+            status = getattr(e, 'http_status', None)
+            headers = getattr(e, 'headers', {}) or {}
+            if status == 429:
+                rate_limited += 1
+                if rate_limited > RATE_LIMIT_RETRIES:
+                    raise
+                retry_after = int(headers.get('Retry-After', 1))
+                metrics.inc('search_rate_limited_total')
+                events.emit(RETRY, reason='rate_limited', delay=retry_after, attempt=rate_limited,
+                            retries=RATE_LIMIT_RETRIES, error=e)
+                gate.block(retry_after)
+                continue
+            else:
+                if attempt < retries:
+                    sleep_time = backoff + random.random()
+                    events.emit(RETRY, reason='error', delay=sleep_time, attempt=attempt, retries=retries, error=e)
+                    metrics.inc('search_errors_total')
+                    metrics.inc('search_backoff_seconds_total', sleep_time)
+                    time.sleep(sleep_time)
+                    backoff *= 2
+                    attempt += 1
+                    continue
+                else:
+                    raise
+        except Exception as e:
+            if attempt < retries:
+                sleep_time = backoff + random.random()
+                events.emit(RETRY, reason='error', delay=sleep_time, attempt=attempt, retries=retries, error=e)
+                metrics.inc('search_errors_total')
+                metrics.inc('search_backoff_seconds_total', sleep_time)
+                time.sleep(sleep_time)
+                backoff *= 2
+                attempt += 1
+                continue
+            else:
+                raise
+    return None
+
+
+def format_line(song_name, context):
+    """Input line as shown in logs: "song - context", or just the song/URI/ISRC."""
+    return f"{song_name} - {context}" if context else song_name
+
+
+def primary_artist(track):
+    artists = track.get('artists') or []
+    return artists[0]['name'] if artists else ''
+
+
+def describe_track(track):
+    """Human-readable "name by artist" for a TrackMatch (just the URI for direct links)."""
+    return f"{track.name} by {track.artist}" if track.artist else track.name
+
+
+_BRACKETS_RE = re.compile(r'\s*[\(\[][^\)\]]*[\)\]]')
+_VERSION_SUFFIX_RE = re.compile(r'\s+-\s+.*$')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+
+def match_text(text):
+    """Loose form of a title/artist for scoring: no brackets, versions, punctuation or case."""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = _VERSION_SUFFIX_RE.sub('', _BRACKETS_RE.sub('', text))
+    return ' '.join(_NON_WORD_RE.sub(' ', text).split())
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def score_candidate(song_name, context, track):
+    """Score how well a search result matches an input line, from 0.0 to 1.0.
+
+    The title carries most of the weight; the context is compared against the
+    artists and album (it is often a film or album name rather than an artist).
+    """
+    name_score = _similarity(match_text(song_name), match_text(track.get('name')))
+    ctx = match_text(context)
+    if not ctx:
+        return name_score
+    fields = [match_text(a.get('name')) for a in track.get('artists') or []]
+    fields.append(match_text((track.get('album') or {}).get('name')))
+    fields = [f for f in fields if f]
+    haystack = ' '.join(fields)
+    ctx_tokens = ctx.split()
+    overlap = sum(1 for tok in ctx_tokens if tok in haystack.split()) / len(ctx_tokens)
+    ctx_score = max([overlap] + [_similarity(ctx, f) for f in fields])
+    return 0.7 * name_score + 0.3 * ctx_score
+
+
+def plan_queries(song_name, context):
+    """Queries to try for a free-text line, from most to least specific."""
+    queries = [f'track:"{song_name}" {context}'.strip()]
+    if context:
+        queries.append(f'track:"{song_name}" artist:"{context}"')
+    queries.append(f'{song_name} {context}'.strip())
+    # drop repeats (e.g. no context) while keeping the order
+    return list(dict.fromkeys(queries))
+
+
+def resolve_line(sp, song_name, context, cache=None, stats=None):
+    """Find the best track for one free-text line using the tiered query planner.
+
+    Tries strict, field-scoped and relaxed queries in turn, scoring every
+    candidate locally, and stops as soon as one reaches MATCH_THRESHOLD. If
+    none does, the best candidate above MATCH_MIN_SCORE is used. Returns
+    (track, score) or (None, best score seen).
+    """
+    best, best_score = None, 0.0
+    for query in plan_queries(song_name, context):
+        results = safe_search(sp, query, type='track', limit=5, cache=cache, stats=stats)
+        for item in (results or {}).get('tracks', {}).get('items') or []:
+            if not item:
+                continue
+            score = score_candidate(song_name, context, item)
+            if score > best_score:
+                best, best_score = item, score
+        if best_score >= MATCH_THRESHOLD:
+            break
+    if best is None or best_score < MATCH_MIN_SCORE:
+        return None, best_score
+    return best, best_score
+
+
+class _FinishedLookup:
+    """Stands in for a finished Future when a duplicate reuses a recent result."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+    def cancel(self):
+        return False
+
+
+def search_songs(sp, songs, concurrency=SEARCH_CONCURRENCY, cache=None, stats=None, job=None, catalog=None):
+    """Search for songs on a bounded worker pool.
+
+    songs may be any iterable (including a lazy file reader); only a small
+    window of lines is in flight at once. Yields (song_name, context, track,
+    error) in input order; track is a TrackMatch or None, error is the
+    exception raised by the search, if any. Search responses are reduced to a
+    TrackMatch inside the worker, so no raw payload outlives its lookup.
+
+    Lines parsed as track URIs are passed straight through without an API call,
+    ISRC lines use a one-result isrc: lookup, and free-text lines go through
+    the query planner (resolve_line). Lines with the same canonical_key share one
+    lookup: a duplicate reuses the first line's future, so it waits for a
+    search already in flight instead of issuing its own, or the result of one
+    of the last SEARCH_RECENT_KEYS distinct lines resolved. Only those are
+    remembered, so memory stays flat on any input size; an older duplicate is
+    searched again, normally from the search cache.
+
+    With a catalog (TrackCatalog), ISRC and free-text lines are looked up
+    locally first and only misses reach the API; API matches are added to the
+    catalog so later runs find them locally.
+
+    With a job, every yielded line advances its progress and the loop raises
+    JobCancelled at the next line once it is cancelled; queued lookups are
+    dropped rather than sent.
+
+    Each lookup sent to the pool is published as a SEARCH_STARTED event and
+    each yielded line as a SEARCH_FINISHED event, in input order, with the
+    seconds it spent queued and searching; the pool's threads are bound to job.
+    Each lookup is timed as a 'search' phase for the profiler, on its worker.
+    """
+    def lookup(song_name, context):
+        """Returns (track, error, api_calls used)."""
+        with phase('search'):
+            return find(song_name, context)
+
+    def find(song_name, context):
+        if song_name.startswith('spotify:track:'):
+            return TrackMatch(song_name, '', song_name, 1.0), None, 0
+        if catalog is not None:
+            if song_name.startswith('isrc:'):
+                track, score = catalog.lookup_isrc(song_name), 1.0
+            else:
+                track, score = catalog.lookup(song_name, context)
+            if track is not None:
+                if stats is not None:
+                    stats.add(local_hits=1)
+                return TrackMatch.from_track(track, score), None, 0
+        local = SearchStats()
+        try:
+            if song_name.startswith('isrc:'):
+                results = safe_search(sp, song_name, type='track', limit=1, cache=cache, stats=local)
+                items = results.get('tracks', {}).get('items') if results else []
+                track, score = (items[0] if items else None), 1.0
+            else:
+                track, score = resolve_line(sp, song_name, context, cache=cache, stats=local)
+        except Exception as e:
+            return None, e, local.api_calls
+        finally:
+            if stats is not None:
+                stats.add(api_calls=local.api_calls)
+        if track is None:
+            return None, None, local.api_calls
+        if catalog is not None:
+            catalog.add(track)
+        return TrackMatch.from_track(track, score), None, local.api_calls
+
+    def result(entry):
+        song_name, context, key, future, duplicate, queued = entry
+        track, error, calls = value = future.result()
+        if not duplicate:
+            # later duplicates only need the value, and only for a bounded number of recent keys
+            inflight.pop(key, None)
+            if error is None:
+                recent[key] = value
+                if len(recent) > SEARCH_RECENT_KEYS:
+                    recent.popitem(last=False)
+        if stats is not None:
+            stats.add(lines=1, resolved=1 if track else 0)
+            if duplicate:
+                stats.add(coalesced=1, calls_saved=calls)
+        if job is not None:
+            job.advance(api_calls=0 if duplicate else calls)
+        events.emit(SEARCH_FINISHED, job, song=song_name, context=context, track=track, error=error,
+                    api_calls=0 if duplicate else calls, seconds=time.perf_counter() - queued)
+        return song_name, context, track, error
+
+    workers = max(1, concurrency)
+    pending = deque()
+    inflight = {}           # canonical_key -> future of a lookup not yet yielded
+    recent = OrderedDict()  # canonical_key -> (track, error, calls) of recently yielded lookups, oldest first
+    with ThreadPoolExecutor(max_workers=workers, initializer=events.bind_job, initargs=(job,)) as pool:
+        try:
+            for song_name, context in songs:
+                if job is not None:
+                    job.check()
+                key = canonical_key(song_name, context)
+                future = inflight.get(key)
+                if future is None and key in recent:
+                    recent.move_to_end(key)
+                    future = _FinishedLookup(recent[key])
+                duplicate = future is not None
+                if not duplicate:
+                    future = inflight[key] = pool.submit(lookup, song_name, context)
+                    events.emit(SEARCH_STARTED, job, song=song_name, context=context)
+                pending.append((song_name, context, key, future, duplicate, time.perf_counter()))
+                if len(pending) >= workers * 4:
+                    yield result(pending.popleft())
+            while pending:
+                if job is not None:
+                    job.check()
+                yield result(pending.popleft())
+        except JobCancelled:
+            for entry in pending:
+                entry[3].cancel()
+            raise
@@ -0,0 +1,143 @@
+"""The shared, authenticated Spotify client.
+
+spotipy and requests are imported on first use, so code that never talks to
+Spotify (parsing, the cache, --help) does not pay for loading them.
+"""
+import threading
+import time
+
+from .config import (CLIENT_ID, CLIENT_SECRET, REDIRECT_URI, SEARCH_CONCURRENCY, SPOTIFY_HTTP_RETRIES,
+                     SPOTIFY_RETRY_BACKOFF, SPOTIFY_RETRY_STATUSES, TOKEN_REFRESH_MARGIN)
+from .events import events
+from .governor import call_with_rate_limit
+from .metrics import metrics
+
+
+def build_http_session(pool_size=SEARCH_CONCURRENCY):
+    """requests session whose keep-alive pool fits pool_size concurrent requests.
+
+    It also retries 5xx answers (SPOTIFY_RETRY_STATUSES) for every method.
+    spotipy only sets up its own retries when it builds the session itself,
+    so they have to be mounted here. 429s are not retried at this level.
+    """
+    import requests
+    import urllib3
+    from requests.adapters import HTTPAdapter
+
+    http = requests.Session()
+    retry = urllib3.Retry(
+        total=SPOTIFY_HTTP_RETRIES,
+        connect=None,
+        read=False,
+        status=SPOTIFY_HTTP_RETRIES,
+        status_forcelist=SPOTIFY_RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+        backoff_factor=SPOTIFY_RETRY_BACKOFF,
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, pool_size + 2), max_retries=retry)
+    http.mount('https://', adapter)
+    http.mount('http://', adapter)
+    return http
+
+
+class SpotifySession:
+    """One long-lived authenticated client per app session.
+
+    Owns a pooled HTTP session (shared by the API client and token refreshes),
+    remembers the logged-in user, and can keep the access token fresh in the
+    background so no request has to wait on a refresh.
+    """
+
+    def __init__(self, pool_size=SEARCH_CONCURRENCY):
+        import spotipy
+        from spotipy.oauth2 import SpotifyOAuth
+
+        scope = "playlist-modify-public playlist-modify-private"
+        self.http = build_http_session(pool_size)
+        self.auth_manager = SpotifyOAuth(
+            client_id=CLIENT_ID,
+            client_secret=CLIENT_SECRET,
+            redirect_uri=REDIRECT_URI,
+            scope=scope,
+            requests_session=self.http
+        )
+        self.client = spotipy.Spotify(auth_manager=self.auth_manager, requests_session=self.http)
+        self._user = None
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def user(self):
+        """current_user(), fetched once per session."""
+        with self._lock:
+            if self._user is None:
+                with metrics.time('current_user_seconds'):
+                    self._user = call_with_rate_limit(self.client.current_user)
+            return self._user
+
+    def has_cached_token(self):
+        return self.auth_manager.cache_handler.get_cached_token() is not None
+
+    def refresh_token_if_needed(self, margin=TOKEN_REFRESH_MARGIN):
+        """Refresh the cached token if it expires within margin seconds."""
+        token = self.auth_manager.cache_handler.get_cached_token()
+        if token and token.get('refresh_token') and token.get('expires_at', 0) - time.time() < margin:
+            with metrics.time('token_refresh_seconds'):
+                self.auth_manager.refresh_access_token(token['refresh_token'])
+
+    def warm_up(self):
+        """Refresh the token and open a keep-alive connection, without ever prompting for login.
+
+        Does nothing if there is no cached token yet (first login stays interactive).
+        """
+        if not self.has_cached_token():
+            return False
+        self.refresh_token_if_needed()
+        self.user()
+        return True
+
+    def start_token_refresh(self, interval=60):
+        """Keep the token fresh from a daemon thread for the rest of the session."""
+        if self._refresher is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh_token_if_needed()
+                except Exception as e:
+                    events.log(f"Background token refresh failed: {e}")
+
+        self._refresher = threading.Thread(target=loop, daemon=True)
+        self._refresher.start()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size=SEARCH_CONCURRENCY):
+    """The app-wide SpotifySession, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            with metrics.time('auth_seconds'):
+                _session = SpotifySession(pool_size=pool_size)
+            _session.start_token_refresh()
+        return _session
+
+
+def create_spotify_client(pool_size=SEARCH_CONCURRENCY):
+    """Authenticated Spotify client for playlist work (shared for the whole app session)."""
+    return get_session(pool_size).client
+
+
+def current_user(sp):
+    """sp.current_user() with timing; answered from the session for the shared client."""
+    session = _session
+    if session is not None and sp is session.client:
+        return session.user()
+    with metrics.time('current_user_seconds'):
+        return call_with_rate_limit(sp.current_user)
@@ -0,0 +1,169 @@
+"""Sharding: one oversized input spread over numbered playlists ("Name (1/3)", ...)."""
+import csv
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import PLAYLIST_MAX_TRACKS, REPORT_DIR, SEARCH_CONCURRENCY
+from .events import events
+from .governor import call_with_rate_limit
+from .jobs import JobCancelled
+from .parser import source_line_numbers
+from .playlist import add_tracks_in_batches
+from .search import SearchStats, format_line, search_songs
+from .session import current_user
+
+
+def shard_name(playlist_name, index, count):
+    """Name of shard `index` (1-based) of `count`; a single shard keeps the plain name."""
+    return playlist_name if count == 1 else f"{playlist_name} ({index}/{count})"
+
+
+class ShardPlan:
+    """Deduplicated URIs in input order, cut into shards of at most shard_size.
+
+    Every input line is kept as (line number, input text, URI or '') so the
+    report can say which shard each line landed in; a repeated track lives in
+    the shard of its first occurrence.
+    """
+
+    def __init__(self, shard_size=PLAYLIST_MAX_TRACKS):
+        if shard_size < 1:
+            raise ValueError('shard size must be at least 1')
+        self.shard_size = shard_size
+        self.uris = []
+        self.position = {}      # uri -> index in uris
+        self.lines = []
+
+    def add_line(self, line_no, text, uri=None):
+        if uri and uri not in self.position:
+            self.position[uri] = len(self.uris)
+            self.uris.append(uri)
+        self.lines.append((line_no, text, uri or ''))
+
+    @property
+    def count(self):
+        """Number of shards (at least one, so an empty run still reports a playlist)."""
+        return max(1, -(-len(self.uris) // self.shard_size))
+
+    def shard_of(self, uri):
+        """1-based shard holding uri."""
+        return self.position[uri] // self.shard_size + 1
+
+    def shards(self):
+        size = self.shard_size
+        return [self.uris[i:i + size] for i in range(0, len(self.uris), size)] or [[]]
+
+    def not_found(self):
+        return [text for _, text, uri in self.lines if not uri]
+
+
+def plan_from_search(sp, songs, shard_size=PLAYLIST_MAX_TRACKS, concurrency=SEARCH_CONCURRENCY, cache=None,
+                     catalog=None, job=None):
+    """Resolve every line and return its ShardPlan. Nothing is added to Spotify yet.
+
+    Lines are numbered as in the source file when songs is a SongList.
+    """
+    plan = ShardPlan(shard_size)
+    stats = SearchStats()
+    line_nos = source_line_numbers(songs)
+    results = search_songs(sp, songs, concurrency, cache=cache, stats=stats, job=job, catalog=catalog)
+    for line_no, (song_name, context, track, _) in zip(line_nos, results):
+        plan.add_line(line_no, format_line(song_name, context), track.uri if track else None)
+    events.log(f"\n{stats.report()}")
+    return plan
+
+
+def plan_from_preview(artifact, shard_size=PLAYLIST_MAX_TRACKS):
+    """ShardPlan of a saved preview; excluded rows count as not added."""
+    plan = ShardPlan(shard_size)
+    for line_no, song_name, context, _, _, uri, _ in artifact.rows:
+        plan.add_line(line_no, format_line(song_name, context), None if line_no in artifact.excluded else uri)
+    return plan
+
+
+def fill_shards(sp, plan, playlist_name, public, description, jobs=4, user=None, job=None):
+    """Create one playlist per shard and fill them in parallel (up to `jobs` at once).
+
+    Returns one dict per shard: index, name, id, url, tracks, added, status.
+    """
+    if user is None:
+        user = current_user(sp)
+        events.log(f"Logged in as: {user.get('display_name')}")
+    shards = plan.shards()
+    count = plan.count
+    events.log(f"Splitting {len(plan.uris)} tracks into {count} playlists of up to {plan.shard_size}")
+
+    def fill(index, uris):
+        name = shard_name(playlist_name, index, count)
+        result = {'index': index, 'name': name, 'id': None, 'url': None, 'tracks': len(uris), 'added': 0,
+                  'status': 'ok'}
+        try:
+            if job is not None:
+                job.check()
+            playlist = call_with_rate_limit(sp.user_playlist_create, user=user['id'], name=name, public=public,
+                                            description=description)
+            result['id'], result['url'] = playlist['id'], playlist['external_urls']['spotify']
+            events.log(f"Created playlist: {name}")
+            result['added'] = add_tracks_in_batches(sp, playlist['id'], uris)
+            events.log(f"✓ {name}: {result['added']} of {len(uris)} tracks added")
+        except JobCancelled:
+            # shards already being filled finish; the rest are reported as skipped
+            result['status'] = 'skipped (cancelled)'
+        except Exception as e:
+            events.log(f"Error filling {name}: {e}")
+            result['status'] = f'error: {e}'
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, count)), initializer=events.bind_job,
+                            initargs=(job,)) as pool:
+        return list(pool.map(fill, range(1, count + 1), shards))
+
+
+def create_sharded(sp, plan, playlist_name, public, description, report_path=None, jobs=4, user=None, job=None):
+    """Fill the plan's shards, write the line-to-shard report and print the summary.
+
+    Returns (per-shard results, report path or None if it could not be written).
+    """
+    results = fill_shards(sp, plan, playlist_name, public, description, jobs=jobs, user=user, job=job)
+    try:
+        report_path = write_shard_report(plan, results, report_path or default_report_path(playlist_name))
+    except OSError as e:
+        events.log(f"Error writing shard report: {e}")
+        report_path = None
+    print_shard_report(plan, results, report_path)
+    return results, report_path
+
+
+def default_report_path(playlist_name):
+    slug = re.sub(r'[^\w.-]+', '_', playlist_name).strip('_') or 'playlist'
+    return os.path.join(REPORT_DIR, f"{slug}-{time.strftime('%Y%m%d-%H%M%S')}-shards.csv")
+
+
+def write_shard_report(plan, results, path):
+    """CSV of every input line with its URI and the shard/playlist it was added to."""
+    by_index = {r['index']: r for r in results}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('line', 'input', 'uri', 'shard', 'playlist', 'playlist_url'))
+        for line_no, text, uri in plan.lines:
+            if uri:
+                shard = by_index[plan.shard_of(uri)]
+                writer.writerow((line_no, text, uri, shard['index'], shard['name'], shard['url'] or ''))
+            else:
+                writer.writerow((line_no, text, '', '', '', ''))
+    return path
+
+
+def print_shard_report(plan, results, report_path=None):
+    events.log(f"\n{'='*60}")
+    events.log(f"Sharded into {len(results)} playlists")
+    events.log(f"{'='*60}")
+    for r in results:
+        events.log(f"{r['name'][:40]:<40} {r['added']:>6}/{r['tracks']:<6} {r['status']}  {r['url'] or ''}")
+    not_found = plan.not_found()
+    events.log(f"Summary: {sum(r['added'] for r in results)} songs added, {len(not_found)} not found")
+    if report_path:
+        events.log(f"Line-to-playlist report: {report_path}")
@@ -0,0 +1,264 @@
+"""Watch-folder mode: song files that keep growing, with only their new lines searched and added."""
+import hashlib
+import os
+import sqlite3
+import threading
+
+from .batch import find_song_files, playlist_name_for
+from .config import SEARCH_CONCURRENCY, WATCH_INTERVAL, WATCH_STATE_PATH
+from .events import events
+from .governor import call_with_rate_limit
+from .metrics import metrics
+from .parser import parse_lines
+from .playlist import add_tracks_in_batches, resolve_uris, sync_playlist
+from .session import current_user
+
+# Bytes just before the stored offset that are re-read and compared on every
+# change, to notice an edited file without hashing all of it
+TAIL_BYTES = 4096
+
+
+class WatchState:
+    """SQLite record of every watched file and the tracks already added for it.
+
+    Per file: its playlist, the byte offset up to which lines were processed
+    (always just after a newline), the size and mtime seen at the last check,
+    the SHA-256 of everything before the offset and a hash of its last
+    TAIL_BYTES. The URIs added to each file's playlist are kept so a track
+    appended twice is only added once.
+    """
+
+    def __init__(self, path=WATCH_STATE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS watched_files ('
+            'path TEXT PRIMARY KEY, playlist_id TEXT NOT NULL, playlist_url TEXT NOT NULL, '
+            'offset INTEGER NOT NULL, size INTEGER NOT NULL, mtime INTEGER NOT NULL, '
+            'digest TEXT NOT NULL, tail TEXT NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS watched_uris ('
+            'path TEXT NOT NULL, uri TEXT NOT NULL, PRIMARY KEY (path, uri)) WITHOUT ROWID'
+        )
+
+    def get(self, path):
+        """The stored record of path as a dict, or None if it was never processed."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT playlist_id, playlist_url, offset, size, mtime, digest, tail FROM watched_files WHERE path = ?',
+                (path,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('playlist_id', 'playlist_url', 'offset', 'size', 'mtime', 'digest', 'tail')
+        return dict(zip(keys, row))
+
+    def save(self, path, rec):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO watched_files VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (path, rec['playlist_id'], rec['playlist_url'], rec['offset'], rec['size'], rec['mtime'],
+                 rec['digest'], rec['tail'])
+            )
+
+    def new_uris(self, path, uris):
+        """The URIs not yet added to path's playlist, in the given order."""
+        with self._lock:
+            return [uri for uri in uris if self._conn.execute(
+                'SELECT 1 FROM watched_uris WHERE path = ? AND uri = ?', (path, uri)).fetchone() is None]
+
+    def record_uris(self, path, uris):
+        with self._lock:
+            self._conn.executemany('INSERT OR IGNORE INTO watched_uris VALUES (?, ?)', [(path, uri) for uri in uris])
+
+    def reset_uris(self, path, uris):
+        """Replace the URIs recorded for path (after a full resync of its playlist)."""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.execute('DELETE FROM watched_uris WHERE path = ?', (path,))
+                self._conn.executemany('INSERT OR IGNORE INTO watched_uris VALUES (?, ?)',
+                                       [(path, uri) for uri in uris])
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _BatchRecorder:
+    """Journal stand-in for add_tracks_in_batches: records each committed batch in the watch state."""
+
+    def __init__(self, state, path):
+        self.state = state
+        self.path = path
+
+    def record_batch(self, uris):
+        self.state.record_uris(self.path, uris)
+
+
+def _tail_hash(data):
+    return hashlib.sha1(data[-TAIL_BYTES:]).hexdigest()
+
+
+class FolderWatcher:
+    """Polls the song files of a directory (or glob) and adds their new lines to one playlist each.
+
+    A poll costs one stat per file. A file that grew is read from its stored
+    offset (plus the TAIL_BYTES before it, to check they are unchanged), only
+    its complete new lines are parsed and resolved, and their tracks are
+    appended to the file's playlist in batches. A partial last line waits for
+    the next poll. A new file gets its own playlist named after it. A file
+    that shrank or whose processed part was edited is resynced as a whole:
+    its playlist is made to match the file, as with --sync.
+
+    The SHA-256 of each file's processed part is checked in full once, the
+    first time this process looks at the file, and then kept up to date as
+    lines are appended.
+    """
+
+    def __init__(self, sp, target, state=None, cache=None, catalog=None, concurrency=SEARCH_CONCURRENCY,
+                 public=True, user=None):
+        self.sp = sp
+        self.target = target
+        self.state = state or WatchState()
+        self.cache = cache
+        self.catalog = catalog
+        self.concurrency = concurrency
+        self.public = public
+        self.user = user
+        self._hashers = {}      # path -> sha256 of the processed part, once verified by this process
+
+    def _user(self):
+        if self.user is None:
+            self.user = current_user(self.sp)
+            events.log(f"Logged in as: {self.user.get('display_name')}")
+        return self.user
+
+    def poll(self):
+        """Check every file once. Returns the number of new lines processed."""
+        lines = 0
+        for path in find_song_files(self.target):
+            path = os.path.abspath(path)
+            try:
+                lines += self.check_file(path)
+            except Exception as e:
+                events.log(f"Error processing {path}: {e}")
+        return lines
+
+    def run(self, interval=WATCH_INTERVAL, stop=None):
+        """Poll every `interval` seconds until stop (a threading.Event) is set or Ctrl+C."""
+        stop = stop or threading.Event()
+        events.log(f"Watching {self.target} every {interval:g}s (Ctrl+C to stop)")
+        try:
+            while not stop.is_set():
+                self.poll()
+                stop.wait(interval)
+        except KeyboardInterrupt:
+            events.log("Stopped watching.")
+
+    def check_file(self, path):
+        st = os.stat(path)
+        rec = self.state.get(path)
+        if rec is None:
+            return self._start(path, st)
+        if st.st_size == rec['size'] and st.st_mtime_ns == rec['mtime'] and path in self._hashers:
+            return 0
+        if path not in self._hashers and not self._verify(path, rec):
+            return self._resync(path, rec, st)
+        if st.st_size < rec['offset']:
+            events.log(f"{path} got shorter; resyncing its playlist")
+            return self._resync(path, rec, st)
+
+        start = max(0, rec['offset'] - TAIL_BYTES)
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read()
+        tail, new = data[:rec['offset'] - start], data[rec['offset'] - start:]
+        if _tail_hash(tail) != rec['tail']:
+            events.log(f"{path} was edited; resyncing its playlist")
+            return self._resync(path, rec, st)
+        complete = new[:new.rfind(b'\n') + 1]
+        rec.update(size=st.st_size, mtime=st.st_mtime_ns)
+        if not complete:
+            self.state.save(path, rec)
+            return 0
+        count, ok = self._append(path, rec, complete)
+        if ok:
+            hasher = self._hashers[path]
+            hasher.update(complete)
+            rec.update(offset=rec['offset'] + len(complete), digest=hasher.hexdigest(),
+                       tail=_tail_hash(tail + complete))
+        else:
+            # leave the offset so the lines are tried again; tracks already added are skipped then
+            rec['mtime'] = -1
+        self.state.save(path, rec)
+        return count
+
+    def _verify(self, path, rec):
+        """Hash the processed part of a known file once; False if it no longer matches."""
+        hasher = hashlib.sha256()
+        remaining = rec['offset']
+        with open(path, 'rb') as f:
+            while remaining > 0:
+                chunk = f.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        if remaining or hasher.hexdigest() != rec['digest']:
+            events.log(f"{path} changed while it was not being watched; resyncing its playlist")
+            return False
+        self._hashers[path] = hasher
+        return True
+
+    def _append(self, path, rec, data):
+        """Resolve the complete lines in data and add their new tracks. Returns (lines, all added)."""
+        songs = list(parse_lines(data.decode('utf-8', errors='replace').splitlines()))
+        metrics.inc('watch_lines_total', len(songs))
+        if not songs:
+            return 0, True
+        events.log(f"{os.path.basename(path)}: {len(songs)} new lines")
+        uris, _ = resolve_uris(self.sp, songs, self.concurrency, cache=self.cache, catalog=self.catalog)
+        uris = self.state.new_uris(path, uris)
+        added = add_tracks_in_batches(self.sp, rec['playlist_id'], uris, journal=_BatchRecorder(self.state, path))
+        metrics.inc('watch_tracks_added_total', added)
+        events.log(f"✓ {os.path.basename(path)}: {added} tracks added to {rec['playlist_url']}")
+        return len(songs), added == len(uris)
+
+    def _start(self, path, st):
+        """First sight of a file: create its playlist and process every complete line."""
+        name = playlist_name_for(path)
+        playlist = call_with_rate_limit(self.sp.user_playlist_create, user=self._user()['id'], name=name,
+                                        public=self.public, description=f'Created from {path}')
+        events.log(f"Created playlist: {name}")
+        events.log(f"Playlist URL: {playlist['external_urls']['spotify']}")
+        rec = {'playlist_id': playlist['id'], 'playlist_url': playlist['external_urls']['spotify'],
+               'offset': 0, 'size': 0, 'mtime': -1, 'digest': hashlib.sha256().hexdigest(), 'tail': _tail_hash(b'')}
+        self.state.save(path, rec)
+        self._hashers[path] = hashlib.sha256()
+        return self.check_file(path)
+
+    def _resync(self, path, rec, st):
+        """Make the playlist match the whole file again, then continue incrementally from its end."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        complete = data[:data.rfind(b'\n') + 1]
+        songs = list(parse_lines(complete.decode('utf-8', errors='replace').splitlines()))
+        uris, _ = resolve_uris(self.sp, songs, self.concurrency, cache=self.cache, catalog=self.catalog)
+        sync_playlist(self.sp, rec['playlist_id'], uris)
+        self.state.reset_uris(path, uris)
+        metrics.inc('watch_resyncs_total')
+        hasher = self._hashers[path] = hashlib.sha256(complete)
+        rec.update(offset=len(complete), size=st.st_size, mtime=st.st_mtime_ns, digest=hasher.hexdigest(),
+                   tail=_tail_hash(complete))
+        self.state.save(path, rec)
+        return len(songs)